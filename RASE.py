@@ -39,16 +39,17 @@ def R_check(*args):
 def rase_check(A, S, E, R):
     return A or S or E or R
 
-A = A_check(True, True, True, True)
-S = S_check(False, False, True)
-E = E_check(False, True)
-R = R_check(True, True, True, False)
-
-RASE = rase_check(A, S, E, R)
-
-print('A check:', A)
-print('S check:', S)
-print('E check:', E)
-print('R check:', R)
-print('RASE check:', RASE)
+if __name__ == "__main__":
+    A = A_check(True, True, True, True)
+    S = S_check(False, False, True)
+    E = E_check(False, True)
+    R = R_check(True, True, True, False)
+
+    RASE = rase_check(A, S, E, R)
+
+    print('A check:', A)
+    print('S check:', S)
+    print('E check:', E)
+    print('R check:', R)
+    print('RASE check:', RASE)
 
@@ -0,0 +1,352 @@
+"""
+Headless batch check of IFC files, for build servers without a display.
+
+    python afu_cli.py config.json models/ -o results/ --jobs 4
+
+The config (JSON, or YAML when PyYAML is installed) looks like:
+
+    {
+        "usage_category": 1,
+        "public_building": false,
+        "method": "sampled",
+        "tolerance_mm": 5,
+        "escape_routes": {"0.2": 120, "0.3": 40},
+        "files": {"Music_box_rev2.ifc": {"escape_routes": ["0.2"]}}
+    }
+
+"escape_routes" maps room names (or GlobalIds) to the number of people escaping
+through them, a plain list of names means no people count. Entries under "files"
+override the settings for single files.
+
+With --memory (or a memory budget) every file is checked in a fresh process, and its
+peak RSS, the Python memory per stage and the largest allocation sites go into
+results.json. "memory_budget_mb" in the config or --memory-budget sets the highest
+peak RSS a file may reach.
+
+Exit status: 0 when every checked room meets BR18, 1 when a room does not,
+2 when a file could not be checked, 3 when a file went over the memory budget.
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+import tracing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+from check_fire_regulation_compliance import check_fire_regulation
+from geometry_cache import GeometryCache
+from get_room_geom import load_rooms
+from room import Room
+from width_solver import ADAPTIVE_TOLERANCE, SAMPLED, WIDTH_METHODS
+
+USAGE_CATEGORIES = (1, 2, 3, 4, 5, 6)
+
+COMPLIANCE_STATUS = {
+    0: "not_compliant",
+    1: "br18_compliant",  # wide enough for BR18, not for Universal Design
+    2: "compliant",
+}
+
+CSV_COLUMNS = [
+    "file", "room", "global_id", "long_name", "level", "people",
+    "calculated_width", "required_width", "compliance", "status", "error",
+]
+
+DEFAULT_SETTINGS = {
+    "usage_category": 1,
+    "public_building": False,
+    "method": SAMPLED,
+    "tolerance_mm": ADAPTIVE_TOLERANCE * 1000,
+    "escape_routes": {},
+}
+
+
+def load_config(path) -> dict:
+    with open(path, encoding="utf-8") as file:
+        if path.lower().endswith((".yaml", ".yml")):
+            try:
+                import yaml
+            except ImportError:
+                raise ValueError("YAML configs need PyYAML, install it with 'pip install pyyaml'")
+            config = yaml.safe_load(file) or {}
+        else:
+            config = json.load(file)
+    if not isinstance(config, dict):
+        raise ValueError(f"{path}: the config must be a mapping")
+    return config
+
+
+def get_file_settings(config: dict, file_path) -> dict:
+    """Config settings for one file, with the overrides listed under "files" applied"""
+    settings = dict(DEFAULT_SETTINGS)
+    settings.update({key: value for key, value in config.items() if key != "files"})
+    overrides = config.get("files", {})
+    for name in (file_path, os.path.basename(file_path)):
+        if name in overrides:
+            settings.update(overrides[name])
+            break
+
+    escape_routes = settings["escape_routes"]
+    if isinstance(escape_routes, list):
+        escape_routes = {name: 0 for name in escape_routes}
+    settings["escape_routes"] = {str(name): int(people or 0) for name, people in escape_routes.items()}
+
+    if settings["usage_category"] not in USAGE_CATEGORIES:
+        raise ValueError(f"usage_category must be one of {USAGE_CATEGORIES}, got {settings['usage_category']!r}")
+    if settings["method"] not in WIDTH_METHODS:
+        raise ValueError(f"method must be one of {WIDTH_METHODS}, got {settings['method']!r}")
+    return settings
+
+
+def select_escape_routes(rooms: List[Room], escape_routes: dict):
+    """Marks the configured rooms as escape routes, returns them and the names not found in the model"""
+    selected = []
+    found = set()
+    for room in rooms:
+        key = room.name if room.name in escape_routes else room.global_id
+        room.is_part_of_escape_route = key in escape_routes
+        if room.is_part_of_escape_route:
+            room.number_of_people = escape_routes[key]
+            selected.append(room)
+            found.add(key)
+    missing = [name for name in escape_routes if name not in found]
+    return selected, missing
+
+
+def check_file(file_path, config: dict, cache_dir=None, trace=False, memory=False) -> dict:
+    """Loads and checks one IFC file, errors are reported in the result instead of raised"""
+    if trace or memory:
+        tracing.enable(memory=memory)
+        tracing.clear()
+    started = time.perf_counter()
+    report = {"file": file_path, "rooms": [], "missing_rooms": [], "error": None}
+    try:
+        settings = get_file_settings(config, file_path)
+        cache = GeometryCache(cache_dir) if cache_dir else None
+        rooms = load_rooms(file_path, cache)
+        selected, report["missing_rooms"] = select_escape_routes(rooms, settings["escape_routes"])
+
+        result = check_fire_regulation(
+            selected,
+            settings["public_building"],
+            settings["usage_category"],
+            settings["method"],
+            settings["tolerance_mm"] / 1000,
+        )
+        for index, room in enumerate(selected):
+            compliance = result.compliance_list[index]
+            report["rooms"].append({
+                "room": room.name,
+                "global_id": room.global_id,
+                "long_name": room.long_name,
+                "level": room.level,
+                "people": room.number_of_people,
+                "calculated_width": result.calculated_width_list[index],
+                "required_width": result.min_required_width_list[index],
+                "compliance": compliance,
+                "status": COMPLIANCE_STATUS[compliance],
+            })
+        report["settings"] = settings
+        report["total_rooms"] = len(rooms)
+        report["computed_widths"] = result.computed_widths
+        report["reused_widths"] = result.reused_widths
+    except Exception as e:
+        report["error"] = f"{type(e).__name__}: {e}".strip()
+    report["seconds"] = round(time.perf_counter() - started, 3)
+    if memory:
+        report["peak_rss_bytes"] = tracing.get_peak_rss()
+        report["stage_memory"] = {
+            name: {"peak_bytes": stage["peak_bytes"], "net_bytes": stage["net_bytes"]}
+            for name, stage in tracing.get_summary().items() if "peak_bytes" in stage
+        }
+        report["room_memory"] = tracing.get_room_memory()
+        report["top_allocations"] = tracing.get_top_allocations()
+    if trace:
+        report["spans"] = [dict(record, file=file_path) for record in tracing.get_records()]
+    return report
+
+
+def find_ifc_files(paths, recursive=False) -> List[str]:
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            if recursive:
+                for folder, _, names in os.walk(path):
+                    files.extend(os.path.join(folder, name) for name in names if name.lower().endswith(".ifc"))
+            else:
+                files.extend(
+                    os.path.join(path, name) for name in os.listdir(path) if name.lower().endswith(".ifc")
+                )
+        else:
+            files.append(path)
+    return sorted(files)
+
+
+def send_report(connection, *args) -> None:
+    connection.send(check_file(*args))
+    connection.close()
+
+
+def start_fresh_process(file_path, config, cache_dir, trace, memory):
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(
+        target=send_report, args=(sender, file_path, config, cache_dir, trace, memory), daemon=True
+    )
+    process.start()
+    sender.close()
+    return process, receiver
+
+
+def finish_fresh_process(file_path, process, receiver) -> dict:
+    # Receive before joining, a large report would not fit into the pipe buffer
+    try:
+        report = receiver.recv()
+    except EOFError:
+        report = None
+    process.join()
+    if report is None:
+        report = {
+            "file": file_path, "rooms": [], "missing_rooms": [], "seconds": None,
+            "error": f"The check process exited with code {process.exitcode}",
+        }
+    return report
+
+
+def iter_fresh_process_reports(files, config, cache_dir, jobs, trace=False, memory=False):
+    """Reports in file order, every file checked in its own process with at most `jobs` running"""
+    running = deque()
+    for file_path in files:
+        running.append((file_path, *start_fresh_process(file_path, config, cache_dir, trace, memory)))
+        if len(running) >= max(1, jobs):
+            yield finish_fresh_process(*running.popleft())
+    while running:
+        yield finish_fresh_process(*running.popleft())
+
+
+def iter_reports(files, config, cache_dir, jobs, trace=False, memory=False):
+    """Reports in file order, checked in `jobs` processes"""
+    count = len(files)
+    if not memory and (jobs <= 1 or count <= 1):
+        for file_path in files:
+            yield check_file(file_path, config, cache_dir, trace)
+        return
+
+    if memory and sys.version_info < (3, 11):
+        # ProcessPoolExecutor has no max_tasks_per_child before Python 3.11
+        yield from iter_fresh_process_reports(files, config, cache_dir, jobs, trace, memory)
+        return
+
+    pool_options = {}
+    if memory:
+        # A fresh process per file, so the peak RSS belongs to that file alone
+        pool_options["max_tasks_per_child"] = 1
+    with ProcessPoolExecutor(max_workers=max(1, min(jobs, count)), **pool_options) as executor:
+        yield from executor.map(
+            check_file, files, [config] * count, [cache_dir] * count, [trace] * count, [memory] * count
+        )
+
+
+def write_json(path, reports) -> None:
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump({"files": reports}, file, indent=2)
+
+
+def write_trace(path, reports) -> None:
+    """Per-stage timings over all files, and per-room timings of every file"""
+    spans = [record for report in reports for record in report.pop("spans", [])]
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump({
+            "stages": tracing.get_summary(spans),
+            "files": {
+                report["file"]: {
+                    "stages": tracing.get_summary([span for span in spans if span["file"] == report["file"]]),
+                    "rooms": tracing.get_room_timings([span for span in spans if span["file"] == report["file"]]),
+                }
+                for report in reports
+            },
+            "spans": spans,
+        }, file, indent=2, default=str)
+
+
+def write_csv(path, reports) -> None:
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.DictWriter(file, fieldnames=CSV_COLUMNS)
+        writer.writeheader()
+        for report in reports:
+            if report["error"]:
+                writer.writerow({"file": report["file"], "status": "error", "error": report["error"]})
+            for room in report["rooms"]:
+                writer.writerow({"file": report["file"], **room})
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Check the escape corridor widths of IFC files without the GUI.")
+    parser.add_argument("config", help="JSON or YAML file with the check settings")
+    parser.add_argument("paths", nargs="+", help="IFC files or directories holding IFC files")
+    parser.add_argument("-o", "--output-dir", default=".", help="where results.json and results.csv are written")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="files checked in parallel")
+    parser.add_argument("-r", "--recursive", action="store_true", help="also search subdirectories for IFC files")
+    parser.add_argument("--no-cache", action="store_true", help="do not use the on-disk geometry cache")
+    parser.add_argument("--trace", metavar="FILE", help="write per-stage and per-room timings to this JSON file")
+    parser.add_argument("--memory", action="store_true", help="report peak RSS and Python memory per stage and room")
+    parser.add_argument("--memory-budget", type=float, metavar="MB", help="highest peak RSS allowed per file")
+    args = parser.parse_args(argv)
+
+    try:
+        config = load_config(args.config)
+        get_file_settings(config, "")  # Fail early on invalid settings
+    except (OSError, ValueError) as e:
+        print(f"Invalid config: {e}", file=sys.stderr)
+        return 2
+
+    files = find_ifc_files(args.paths, args.recursive)
+    if not files:
+        print("No IFC files found", file=sys.stderr)
+        return 2
+
+    cache_dir = None if args.no_cache else GeometryCache().directory
+    memory_budget = args.memory_budget if args.memory_budget is not None else config.get("memory_budget_mb")
+    memory = args.memory or memory_budget is not None
+    reports = []
+    for report in iter_reports(files, config, cache_dir, args.jobs, bool(args.trace), memory):
+        reports.append(report)
+        peak_rss = report.get("peak_rss_bytes")
+        if memory_budget is not None and peak_rss is not None:
+            report["memory_budget_exceeded"] = peak_rss > memory_budget * 1e6
+            if report["memory_budget_exceeded"]:
+                print(
+                    f"{report['file']}: peak memory {peak_rss / 1e6:.0f} MB is over the budget of {memory_budget:.0f} MB",
+                    file=sys.stderr,
+                )
+        if report["error"]:
+            print(f"{report['file']}: {report['error']}", file=sys.stderr)
+        else:
+            failed = sum(room["compliance"] == 0 for room in report["rooms"])
+            print(
+                f"{report['file']}: {len(report['rooms'])} rooms checked, {failed} not compliant, "
+                f"{report['reused_widths']} widths reused ({report['seconds']} s)"
+            )
+        for name in report["missing_rooms"]:
+            print(f"{report['file']}: room {name} not found", file=sys.stderr)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    if args.trace:
+        write_trace(args.trace, reports)
+    write_json(os.path.join(args.output_dir, "results.json"), reports)
+    write_csv(os.path.join(args.output_dir, "results.csv"), reports)
+
+    if any(report["error"] for report in reports):
+        return 2
+    if any(report.get("memory_budget_exceeded") for report in reports):
+        return 3
+    if any(room["compliance"] == 0 for report in reports for room in report["rooms"]):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,24 @@
+import multiprocessing
+import queue
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 from typing import List
 from room import Room
-from user_interfaces import ApplicationMainFrame, CollapsibleFrame, UsageCategoryFrame
-from check_fire_regulation_compliance import check_fire_regulation
+import tracing
+from user_interfaces import (
+    ApplicationMainFrame, CollapsibleFrame, PerformanceWindow, ProgressFrame, UsageCategoryFrame, WidthMethodFrame
+)
+from background import BackgroundTask
 from fire_check_results import FireCheckResults
-from get_room_geom import get_rooms
+from fire_check_task import FireCheckTask
+from geometry_cache import GeometryCache
+from room_loader import RoomLoader
 from pdf_export import export_to_pdf
-import ifcopenshell
+from width_memo import WidthCache
+
+
+# How often the UI picks up results from background work (milliseconds)
+POLL_INTERVAL_MS = 100
 
 
 class Application(tk.Tk):
@@ -17,6 +28,14 @@ class Application(tk.Tk):
         self.title("AFU")
         self.geometry("1200x800")
 
+        # Rooms of previously opened IFC files
+        self.geometry_cache = GeometryCache()
+        # Width lines of checked rooms, so checking again after changing the rules inputs is instant
+        self.width_cache = WidthCache()
+        self.rooms: List[Room] = []
+        self.loader: RoomLoader = None
+        self.checker: FireCheckTask = None
+
         # Create main container
         self.main_container = ttk.Frame(self)
         self.main_container.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
@@ -45,6 +64,17 @@ class Application(tk.Tk):
         )
         self.export_button.pack(fill=tk.X, expand=True, side=tk.TOP, pady=10)
 
+        # Timings of the loading, checking, drawing and export stages
+        self.performance_button = ttk.Button(
+            button_frame,
+            text="Performance",
+            command=self.show_performance,
+        )
+        self.performance_button.pack(fill=tk.X, expand=True, side=tk.TOP)
+        self.performance_window: PerformanceWindow = None
+        # Highest peak memory in MB before a warning is shown, empty for no budget
+        self.memory_budget_mb = tk.StringVar(value="")
+
         # Create collapsible frame for controls
         self.controls_frame = CollapsibleFrame(
             self.top_frame, text="Toggle configurations"
@@ -81,6 +111,10 @@ class Application(tk.Tk):
         )
         self.public_check.pack(side=tk.LEFT, padx=20)
 
+        # Width calculation method selector
+        self.width_method_frame = WidthMethodFrame(self.top_frame)
+        self.width_method_frame.pack(side=tk.LEFT, padx=(0, 5))
+
         # Usage category selector
         self.usage_frame = UsageCategoryFrame(self.controls_frame.content)
         self.usage_frame.pack(fill=tk.X, pady=(0, 10))
@@ -89,6 +123,9 @@ class Application(tk.Tk):
         style = ttk.Style()
         style.configure("Green.TButton", background="green", foreground="black")
 
+        # Progress of background work, only shown while something runs
+        self.progress_frame = ProgressFrame(self.main_container)
+
         # Create ApplicationMainFrame for room visualization
         self.app_frame = ApplicationMainFrame(self.main_container)
         self.app_frame.pack(fill=tk.BOTH, expand=True)
@@ -101,45 +138,150 @@ class Application(tk.Tk):
         if not file_path:
             return
         self.file_path.set(file_path)
-        try:
-            model = ifcopenshell.open(file_path)
-            self.rooms = get_rooms(model)
-            self.app_frame.room_canvas.set_rooms(self.rooms)
-            # Update the room list
-            self.app_frame.room_list_frame.update_room_list(
-                self.app_frame.room_canvas.rooms
-            )
-            # Disable the export button when a new file is imported
-            self.export_button.config(state=tk.DISABLED)
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to process file: {str(e)}")
+
+        # Stop a model that is still loading, and a check of the previous model
+        if self.loader is not None:
+            self.loader.cancel()
+        if self.checker is not None:
+            self.checker.cancel()
+
+        self.rooms = []
+        self.app_frame.room_canvas.clear_rooms()
+        self.app_frame.room_list_frame.request_update()
+        # Disable the export button when a new file is imported
+        self.export_button.config(state=tk.DISABLED)
+
+        # Load in the background, rooms show up on the canvas batch by batch
+        self.loader = RoomLoader(file_path, self.geometry_cache)
+        self.loader.start()
+        self.show_progress("Loading rooms", self.loader.cancel)
+        self.after(POLL_INTERVAL_MS, self.poll_task, self.loader, self.on_loader_message, self.on_loader_finished)
+
+    def show_progress(self, text, cancel_command, total=0):
+        self.progress_frame.start(text, cancel_command, total)
+        self.progress_frame.pack(fill=tk.X, pady=(0, 5), before=self.app_frame)
+
+    def poll_task(self, task: BackgroundTask, on_message, on_finished):
+        """Hands the messages of a background task to the handlers until the task is over"""
+        # A newer task replaced this one in the meantime
+        if task is not self.loader and task is not self.checker:
+            return
+
+        while True:
+            try:
+                kind, payload = task.messages.get_nowait()
+            except queue.Empty:
+                break
+            if kind in BackgroundTask.FINAL_MESSAGES:
+                on_finished(kind, payload)
+                return
+            on_message(kind, payload)
+
+        self.after(POLL_INTERVAL_MS, self.poll_task, task, on_message, on_finished)
+
+    def on_loader_message(self, kind, payload):
+        if kind == "total":
+            self.progress_frame.set_progress(len(self.rooms), payload)
+        elif kind == "rooms":
+            self.rooms.extend(payload)
+            self.app_frame.room_canvas.append_rooms(payload)
+            self.progress_frame.set_progress(len(self.rooms))
+
+    def on_loader_finished(self, kind, payload):
+        self.loader = None
+        self.progress_frame.finish()
+        if kind == "error":
+            messagebox.showerror("Error", f"Failed to process file: {payload}")
+            return
+
+        # Keep the streamed items, in model order and fitted to the whole model
+        self.rooms = payload
+        # Also schedules the rebuild of the room list
+        self.app_frame.room_canvas.finish_rooms(self.rooms)
+        self.check_memory_budget()
 
     def check_fire_regulation(self):
         file_path = self.file_path.get()
         if not file_path:
             messagebox.showerror("Error", "Please select an IFC file first")
             return
-        selected_rooms= self.get_selected_rooms_by_names([room.name for room in self.app_frame.room_canvas.get_escape_route_rooms()])
+        if self.loader is not None:
+            messagebox.showerror("Error", "Please wait until the file has finished loading")
+            return
+        if self.checker is not None:
+            return
+        # The canvas draws the loaded rooms themselves, so their selection and people counts are current
+        selected_rooms = self.app_frame.room_canvas.get_escape_route_rooms()
         if not selected_rooms:
             messagebox.showerror("Error", "Please select at least one room")
             return
-        self.app_frame.room_canvas.update_room_people()
-        result: FireCheckResults = check_fire_regulation(selected_rooms, self.public_building.get(), self.usage_frame.get_selected_category())
+
+        # Check in the background, each room shows its result as soon as it is done
+        self.export_button.config(state=tk.DISABLED)
+        self.check_fire_regulation_button.config(state=tk.DISABLED)
+        self.app_frame.clear_results()
+        self.checker = FireCheckTask(
+            selected_rooms,
+            self.public_building.get(),
+            self.usage_frame.get_selected_category(),
+            self.width_method_frame.get_selected_method(),
+            self.width_method_frame.get_tolerance(),
+            self.width_method_frame.get_workers(),
+            self.width_cache,
+        )
+        self.checker.start()
+        self.show_progress("Checking rooms", self.checker.cancel, len(selected_rooms))
+        self.after(POLL_INTERVAL_MS, self.poll_task, self.checker, self.on_check_message, self.on_check_finished)
+
+    def on_check_message(self, kind, payload):
+        if kind == "room":
+            room, result_message = payload
+            self.app_frame.show_room_result(room, result_message)
+            # After a new file was opened the progress bar belongs to its loader
+            if self.loader is None:
+                self.progress_frame.set_progress(len(self.checker.result.compliance_list))
+
+    def on_check_finished(self, kind, payload):
+        self.checker = None
+        if self.loader is None:
+            self.progress_frame.finish()
+        self.check_fire_regulation_button.config(state=tk.NORMAL)
+        if kind == "error":
+            messagebox.showerror("Error", f"Failed to check the rooms: {payload}")
+            return
+        if kind == "cancelled":
+            return
+
+        result: FireCheckResults = payload
         self.result = result
-        self.app_frame.show_results(result.get_result_messages())
+        self.app_frame.show_results(result.rooms, result.get_result_messages())
+        self.app_frame.show_summary(result.get_width_summary())
         self.export_button.config(state=tk.NORMAL)
+        self.check_memory_budget()
 
     def on_export_to_pdf(self):
         export_to_pdf(self)
 
-    def get_selected_rooms_by_names(self, names: List[str]) -> List[Room]:
-        selected_rooms = []
-        for room in self.rooms:
-            room.is_part_of_escape_route = False
-            if room.name in names:
-                room.is_part_of_escape_route = True
-                selected_rooms.append(room)
-        return selected_rooms
+    def show_performance(self):
+        if self.performance_window is not None and self.performance_window.winfo_exists():
+            self.performance_window.refresh()
+            self.performance_window.lift()
+            return
+        self.performance_window = PerformanceWindow(self, self.memory_budget_mb)
+
+    def check_memory_budget(self):
+        """Warns when the process went over the memory budget"""
+        try:
+            budget_mb = float(self.memory_budget_mb.get())
+        except ValueError:
+            return
+        peak_rss = tracing.get_peak_rss()
+        if budget_mb > 0 and peak_rss is not None and peak_rss > budget_mb * 1e6:
+            messagebox.showwarning(
+                "Memory budget",
+                f"Peak memory is {peak_rss / 1e6:.0f} MB, over the budget of {budget_mb:.0f} MB.\n"
+                "Open the Performance window and record memory to see where it goes.",
+            )
 
 def main():
     app = Application()
@@ -147,4 +289,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # Needed by the width analysis worker processes in frozen Windows builds
+    multiprocessing.freeze_support()
     main()
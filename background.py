@@ -0,0 +1,33 @@
+import queue
+import threading
+
+
+class BackgroundTask(threading.Thread):
+    """
+    Work that runs off the UI thread and reports through `messages` as (kind, payload) tuples.
+    The last message is always ("done", ...), ("cancelled", ...) or ("error", message).
+    """
+    FINAL_MESSAGES = ("done", "cancelled", "error")
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.messages = queue.Queue()
+        self._cancelled = threading.Event()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def is_cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def post(self, kind: str, payload=None) -> None:
+        self.messages.put((kind, payload))
+
+    def run(self) -> None:
+        try:
+            self.work()
+        except Exception as e:
+            self.post("error", str(e))
+
+    def work(self) -> None:
+        raise NotImplementedError
@@ -0,0 +1,177 @@
+"""
+Synthetic corridor rooms for the benchmarks.
+
+Every shape is built with a given number of boundary segments. Straight walls are
+subdivided with a 1 mm zigzag, so the extra vertices are not collinear and survive the
+footprint extraction. The zigzag only bulges outwards, so no wall piece leans into the
+room and the width stays the nominal width. Every outline is checked to be simple.
+Besides the Room, every corridor comes with an extruded triangle mesh that
+get_boundaries can read like a shape from the ifcopenshell geometry iterator.
+"""
+import os
+import sys
+import numpy as np
+from types import SimpleNamespace
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from get_room_geom import points_to_vectors
+from room import Room
+
+SHAPES = ("straight", "L", "U", "T", "curve")
+
+# Sideways offset of the subdivision points of straight walls (metres)
+ZIGZAG = 0.001
+
+
+def centerline(shape: str, length: float, count: int):
+    """Centre line of the corridors that are built as one thick polyline, curves use `count` points"""
+    if shape == "straight":
+        return np.array([[0.0, 0.0], [length, 0.0]])
+    if shape == "L":
+        return np.array([[0.0, 0.0], [length / 2, 0.0], [length / 2, length / 2]])
+    if shape == "U":
+        return np.array([[0.0, length / 3], [0.0, 0.0], [length / 3, 0.0], [length / 3, length / 3]])
+    if shape == "curve":
+        # One full S bend
+        t = np.linspace(0, 1, count)
+        return np.column_stack([t * length, np.sin(t * 2 * np.pi) * length / 8])
+    raise ValueError(f"{shape} is not a polyline corridor")
+
+
+def resample(polyline, count: int, keep_out=0.0):
+    """
+    About `count` points evenly spaced along the polyline, keeping its corners. Points closer
+    than `keep_out` to an inner corner are left out, there the offset walls would fold over.
+    """
+    steps = np.linalg.norm(np.diff(polyline, axis=0), axis=1)
+    distance = np.concatenate([[0], np.cumsum(steps)])
+    # Corner points are always kept, the rest is spread by arc length
+    even = np.linspace(0, distance[-1], max(count - len(polyline), 0) + 2)
+    corners = distance[1:-1]
+    if len(corners):
+        even = even[np.abs(even[:, None] - corners[None, :]).min(axis=1) >= keep_out]
+    samples = np.union1d(even, distance)
+    return np.column_stack([np.interp(samples, distance, polyline[:, 0]), np.interp(samples, distance, polyline[:, 1])])
+
+
+def thick_polyline(line, width: float, zigzag: float):
+    """Counter-clockwise outline of the polyline swept with `width`, and its floor triangles"""
+    segment = np.diff(line, axis=0)
+    segment /= np.linalg.norm(segment, axis=1)[:, None]
+    segment_normal = np.column_stack([-segment[:, 1], segment[:, 0]])
+
+    # Miter corners along the bisector, so both walls stay parallel to the centre line
+    tangent = np.vstack([segment[:1], segment[:-1] + segment[1:], segment[-1:]])
+    tangent /= np.linalg.norm(tangent, axis=1)[:, None]
+    normal = np.column_stack([-tangent[:, 1], tangent[:, 0]])
+    miter = np.ones(len(line))
+    miter[1:-1] = 1 / np.maximum(np.einsum("ij,ij->i", normal[1:-1], segment_normal[:-1]), 0.2)
+
+    # Every other point bulges outwards on both sides
+    wobble = zigzag * (np.arange(len(line)) % 2)
+    wobble[[0, -1]] = 0
+    right = line - normal * (width / 2 * miter + wobble)[:, None]
+    left = line + normal * (width / 2 * miter + wobble)[:, None]
+
+    n = len(line)
+    points = np.vstack([right, left[::-1]])
+    i = np.arange(n - 1)
+    right_i, right_next = i, i + 1
+    left_i, left_next = 2 * n - 1 - i, 2 * n - 2 - i
+    triangles = np.vstack([
+        np.column_stack([right_i, right_next, left_next]),
+        np.column_stack([right_i, left_next, left_i]),
+    ])
+    return points, triangles
+
+
+def t_outline(length: float, width: float, segments: int, zigzag: float):
+    """Outline of a T junction, subdivided to `segments` edges, and a fan of floor triangles"""
+    a = length / 2
+    b = length / 3
+    corners = np.array([
+        [-a, 0], [-width / 2, 0], [-width / 2, -b], [width / 2, -b],
+        [width / 2, 0], [a, 0], [a, width], [-a, width],
+    ])
+    edges = np.roll(corners, -1, axis=0) - corners
+    edge_length = np.linalg.norm(edges, axis=1)
+    # One segment per edge, the rest spread by length, what is left over goes to the longest edge
+    extra = max(segments - len(corners), 0)
+    parts = 1 + np.floor(edge_length / edge_length.sum() * extra).astype(int)
+    parts[np.argmax(edge_length)] += len(corners) + extra - parts.sum()
+
+    points = []
+    for corner, edge, count in zip(corners, edges, parts):
+        t = np.arange(count) / count
+        inward = np.array([-edge[1], edge[0]]) / np.linalg.norm(edge)
+        wobble = zigzag * (np.arange(count) % 2)
+        points.append(corner + t[:, None] * edge - wobble[:, None] * inward)
+    points = np.vstack(points)
+
+    # The T is star-shaped around the centre of the junction
+    points = np.vstack([points, [0, width / 2]])
+    centre = len(points) - 1
+    i = np.arange(centre)
+    triangles = np.column_stack([np.full(centre, centre), i, (i + 1) % centre])
+    return points, triangles
+
+
+def is_simple(ring) -> bool:
+    """True when no two edges of the closed outline cross each other"""
+    start = np.asarray(ring, dtype=float)
+    end = np.roll(start, -1, axis=0)
+    edge = end - start
+
+    def sides(points):
+        # Side of every point relative to the line of every edge, shape (edges, points)
+        relative = points[None, :, :] - start[:, None, :]
+        return np.sign(edge[:, None, 0] * relative[..., 1] - edge[:, None, 1] * relative[..., 0])
+
+    # Edge j straddles the line of edge i, two edges cross when both straddle each other
+    straddles = sides(start) * sides(end) < 0
+    return not (straddles & straddles.T).any()
+
+
+def corridor_outline(shape: str, segments: int, length=40.0, width=1.8, zigzag=ZIGZAG):
+    """Outline points (without the centre point of a fan) and floor triangles of a corridor"""
+    if shape == "T":
+        points, triangles = t_outline(length, width, segments, zigzag)
+        outline = points[:-1]
+    else:
+        count = max(segments // 2, 2)
+        line = resample(centerline(shape, length, count), count, keep_out=width)
+        points, triangles = thick_polyline(line, width, zigzag)
+        outline = points
+    if not is_simple(outline):
+        raise ValueError(f"The {shape} corridor with {segments} segments is not a simple polygon")
+    return outline, points, triangles
+
+
+def corridor_room(shape: str, segments: int, length=40.0, width=1.8, people=0, name=None) -> Room:
+    outline, _, _ = corridor_outline(shape, segments, length, width)
+    return Room(
+        name=name or f"{shape}-{len(outline)}",
+        long_name=f"Synthetic {shape} corridor",
+        level="Synthetic",
+        boundaries=points_to_vectors(outline),
+        is_part_of_escape_route=True,
+        number_of_people=people,
+    )
+
+
+def corridor_shape(shape: str, segments: int, length=40.0, width=1.8, height=3.0):
+    """Extruded mesh of the corridor in the layout of an ifcopenshell geometry iterator shape"""
+    outline, floor_points, floor = corridor_outline(shape, segments, length, width)
+    n = len(floor_points)
+    m = len(outline)
+    verts = np.vstack([
+        np.column_stack([floor_points, np.zeros(n)]),
+        np.column_stack([floor_points, np.full(n, height)]),
+    ])
+    i = np.arange(m)
+    j = (i + 1) % m
+    walls = np.vstack([np.column_stack([i, j, j + n]), np.column_stack([i, j + n, i + n])])
+    faces = np.vstack([floor[:, ::-1], floor + n, walls])
+    return SimpleNamespace(geometry=SimpleNamespace(verts=verts.ravel().tolist(), faces=faces.ravel().tolist()))
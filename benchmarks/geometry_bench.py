@@ -0,0 +1,161 @@
+"""
+Micro-benchmarks of the width analysis on synthetic corridors.
+
+    python benchmarks/geometry_bench.py -o before.json
+    python benchmarks/geometry_bench.py -o after.json --compare before.json
+
+Times get_boundaries, perpendicular_lines_from_vector over all walls of a room,
+find_shortest_line, min_width_line with every width method and check_fire_regulation
+end to end, for every corridor shape and size. Every timing is the best of --repeat runs.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+import numpy as np
+
+from corridors import SHAPES, corridor_room, corridor_shape, REPO_DIR  # noqa: F401 (sets up the import path)
+from check_fire_regulation_compliance import check_fire_regulation
+from geometry import find_shortest_line, perpendicular_lines_from_vector
+from get_room_geom import get_boundaries
+from width_solver import WIDTH_METHODS, boundaries_to_walls, get_segment_index, min_width_line
+
+DEFAULT_SIZES = (10, 100, 1000, 10000)
+
+
+def best_time(function, repeat: int) -> float:
+    """Best wall time of `repeat` calls, with the function's prints silenced"""
+    times = []
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            function()
+            times.append(time.perf_counter() - started)
+    return min(times)
+
+
+def all_perpendicular_lines(room):
+    walls = boundaries_to_walls(room.boundaries)
+    index = get_segment_index(walls)
+    lines = []
+    for boundary in room.boundaries:
+        lines.extend(perpendicular_lines_from_vector(
+            boundary, boundary.get_number_of_points_along_line(), walls, 0.1, index
+        ))
+    return lines
+
+
+def bench_room(shape: str, segments: int, methods, repeat: int):
+    room = corridor_room(shape, segments)
+    mesh = corridor_shape(shape, segments)
+    size = {"shape": shape, "segments": len(room.boundaries)}
+    results = []
+
+    seconds = best_time(lambda: get_boundaries(mesh), repeat)
+    results.append({"benchmark": "get_boundaries", **size, "seconds": seconds, "rooms_per_s": 1 / seconds})
+
+    rays = sum(boundary.get_number_of_points_along_line() for boundary in room.boundaries)
+    seconds = best_time(lambda: all_perpendicular_lines(room), repeat)
+    results.append({
+        "benchmark": "perpendicular_lines_from_vector", **size, "seconds": seconds,
+        "rays": rays, "rays_per_s": rays / seconds,
+    })
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        lines = all_perpendicular_lines(room)
+    seconds = best_time(lambda: find_shortest_line(lines), repeat)
+    results.append({
+        "benchmark": "find_shortest_line", **size, "seconds": seconds,
+        "lines": len(lines), "lines_per_s": len(lines) / seconds,
+    })
+
+    for method in methods:
+        seconds = best_time(lambda: min_width_line(room.boundaries, method), repeat)
+        results.append({
+            "benchmark": f"min_width_line[{method}]", **size, "seconds": seconds, "rooms_per_s": 1 / seconds,
+        })
+
+    for method in methods:
+        seconds = best_time(lambda: check_fire_regulation([room], False, 1, method), repeat)
+        results.append({
+            "benchmark": f"check_fire_regulation[{method}]", **size, "seconds": seconds, "rooms_per_s": 1 / seconds,
+        })
+    return results
+
+
+def get_git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def result_key(result):
+    return result["benchmark"], result["shape"], result["segments"]
+
+
+def print_results(results, baseline=None) -> None:
+    previous = {result_key(result): result for result in (baseline or [])}
+    print(f"{'benchmark':<40} {'shape':<9} {'segments':>8} {'time':>11} {'throughput':>22}  change")
+    for result in results:
+        throughput = ""
+        for unit in ("rays", "lines", "rooms"):
+            if f"{unit}_per_s" in result:
+                throughput = f"{result[f'{unit}_per_s']:,.0f} {unit}/s"
+        change = ""
+        old = previous.get(result_key(result))
+        if old:
+            change = f"{old['seconds'] / result['seconds']:.2f}x"
+        print(
+            f"{result['benchmark']:<40} {result['shape']:<9} {result['segments']:>8} "
+            f"{result['seconds'] * 1000:>8.2f} ms {throughput:>22}  {change}"
+        )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the width analysis on synthetic corridors.")
+    parser.add_argument("-o", "--output", default="geometry_bench.json", help="JSON file for the results")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="boundary segments per room")
+    parser.add_argument("--shapes", nargs="+", default=SHAPES, choices=SHAPES)
+    parser.add_argument("--methods", nargs="+", default=WIDTH_METHODS, choices=WIDTH_METHODS)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per timing, the best one is kept")
+    parser.add_argument("--compare", help="earlier results JSON to show the speed-up against")
+    args = parser.parse_args(argv)
+
+    results = []
+    for segments in args.sizes:
+        for shape in args.shapes:
+            results.extend(bench_room(shape, segments, args.methods, args.repeat))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)["results"]
+    print_results(results, baseline)
+
+    report = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": get_git_commit(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "repeat": args.repeat,
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
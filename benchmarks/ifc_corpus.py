@@ -0,0 +1,137 @@
+"""
+Synthetic IFC4 models for the load benchmark.
+
+    python benchmarks/ifc_corpus.py corpus/ --spaces 100 1000 20000 --storeys 4 --vertices 8
+
+Every model has one building with the given number of storeys. The spaces are spread
+evenly over the storeys and laid out on a grid. Each space is a corridor from corridors.py
+with about `vertices` outline points, stored as an extruded IfcArbitraryClosedProfileDef
+like Revit exports it. With --boundaries every wall of a space also gets a 2nd level
+IfcRelSpaceBoundary with a curve-bounded plane as its connection geometry.
+"""
+import argparse
+import math
+import os
+import sys
+import time
+import numpy as np
+
+from corridors import SHAPES, corridor_outline
+
+import ifcopenshell
+import ifcopenshell.api.aggregate
+import ifcopenshell.api.boundary
+import ifcopenshell.api.context
+import ifcopenshell.api.geometry
+import ifcopenshell.api.project
+import ifcopenshell.api.root
+import ifcopenshell.api.unit
+
+# Distance between the origins of neighbouring spaces (metres)
+GRID_SPACING = 50.0
+STOREY_HEIGHT = 3.5
+SPACE_HEIGHT = 3.0
+
+
+def add_space_boundaries(model, space, outline, wall) -> None:
+    """One 2nd level space boundary per outline edge, in the space's own coordinates"""
+    for start, end in zip(outline, np.roll(outline, -1, axis=0)):
+        edge = end - start
+        length = float(np.linalg.norm(edge))
+        direction = edge / length
+        inward = (-direction[1], direction[0], 0.0)
+        boundary = ifcopenshell.api.root.create_entity(model, ifc_class="IfcRelSpaceBoundary2ndLevel")
+        boundary.RelatingSpace = space
+        boundary.RelatedBuildingElement = wall
+        boundary.PhysicalOrVirtualBoundary = "PHYSICAL"
+        boundary.InternalOrExternalBoundary = "INTERNAL"
+        ifcopenshell.api.boundary.assign_connection_geometry(
+            model,
+            rel_space_boundary=boundary,
+            outer_boundary=[(0.0, 0.0), (length, 0.0), (length, SPACE_HEIGHT), (0.0, SPACE_HEIGHT)],
+            location=(float(start[0]), float(start[1]), 0.0),
+            axis=inward,
+            ref_direction=(float(direction[0]), float(direction[1]), 0.0),
+        )
+
+
+def make_model(spaces: int, storeys=1, vertices=8, boundaries=False):
+    model = ifcopenshell.api.project.create_file(version="IFC4")
+    project = ifcopenshell.api.root.create_entity(model, ifc_class="IfcProject", name="Synthetic corpus")
+    ifcopenshell.api.unit.assign_unit(model)  # millimetres
+    context = ifcopenshell.api.context.add_context(model, context_type="Model")
+    body = ifcopenshell.api.context.add_context(
+        model, context_type="Model", context_identifier="Body", target_view="MODEL_VIEW", parent=context
+    )
+
+    site = ifcopenshell.api.root.create_entity(model, ifc_class="IfcSite", name="Site")
+    building = ifcopenshell.api.root.create_entity(model, ifc_class="IfcBuilding", name="Building")
+    ifcopenshell.api.aggregate.assign_object(model, relating_object=project, products=[site])
+    ifcopenshell.api.aggregate.assign_object(model, relating_object=site, products=[building])
+
+    # Outlines are shared by all spaces of the same shape, in millimetres
+    outlines = {shape: corridor_outline(shape, vertices)[0] for shape in SHAPES}
+
+    per_storey = [spaces // storeys + (i < spaces % storeys) for i in range(storeys)]
+    columns = max(1, math.ceil(math.sqrt(max(per_storey))))
+    number = 0
+    for level, count in enumerate(per_storey):
+        storey = ifcopenshell.api.root.create_entity(model, ifc_class="IfcBuildingStorey", name=f"Level {level}")
+        ifcopenshell.api.aggregate.assign_object(model, relating_object=building, products=[storey])
+        wall = None
+        if boundaries:
+            wall = ifcopenshell.api.root.create_entity(model, ifc_class="IfcWall", name=f"Walls {level}")
+
+        storey_spaces = []
+        for i in range(count):
+            shape = SHAPES[number % len(SHAPES)]
+            outline = outlines[shape]
+            space = ifcopenshell.api.root.create_entity(model, ifc_class="IfcSpace", name=f"{level}.{i}")
+            space.LongName = f"Corridor {shape}"
+
+            matrix = np.eye(4)
+            matrix[:3, 3] = (i % columns * GRID_SPACING, i // columns * GRID_SPACING, level * STOREY_HEIGHT)
+            ifcopenshell.api.geometry.edit_object_placement(model, product=space, matrix=matrix)
+
+            points = [model.createIfcCartesianPoint((float(x) * 1000, float(y) * 1000)) for x, y in outline]
+            curve = model.createIfcPolyline(points + [points[0]])
+            profile = model.createIfcArbitraryClosedProfileDef("AREA", None, curve)
+            representation = ifcopenshell.api.geometry.add_profile_representation(
+                model, context=body, profile=profile, depth=SPACE_HEIGHT
+            )
+            ifcopenshell.api.geometry.assign_representation(model, product=space, representation=representation)
+
+            if boundaries:
+                add_space_boundaries(model, space, outline, wall)
+            storey_spaces.append(space)
+            number += 1
+
+        ifcopenshell.api.aggregate.assign_object(model, relating_object=storey, products=storey_spaces)
+    return model
+
+
+def corpus_file_name(spaces, storeys, vertices, boundaries) -> str:
+    return f"spaces-{spaces}_storeys-{storeys}_vertices-{vertices}{'_boundaries' if boundaries else ''}.ifc"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Write synthetic IFC4 models for the load benchmark.")
+    parser.add_argument("directory", help="where the models are written")
+    parser.add_argument("--spaces", type=int, nargs="+", default=[100, 1000], help="spaces per model")
+    parser.add_argument("--storeys", type=int, default=4)
+    parser.add_argument("--vertices", type=int, default=8, help="outline points per space")
+    parser.add_argument("--boundaries", action="store_true", help="add 2nd level space boundaries")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.directory, exist_ok=True)
+    for spaces in args.spaces:
+        path = os.path.join(args.directory, corpus_file_name(spaces, args.storeys, args.vertices, args.boundaries))
+        started = time.perf_counter()
+        model = make_model(spaces, args.storeys, args.vertices, args.boundaries)
+        model.write(path)
+        print(f"{path}: {spaces} spaces, {os.path.getsize(path) / 1e6:.1f} MB in {time.perf_counter() - started:.1f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+"""
+End-to-end load benchmark on the synthetic IFC corpus.
+
+    python benchmarks/load_bench.py --spaces 100 1000 20000 -o load.json
+    python benchmarks/load_bench.py path/to/model.ifc ...
+
+Without files, the corpus models for --spaces are generated into --corpus-dir first
+(existing ones are reused). Every model is measured in a fresh process, so the peak
+memory of one model does not hide the next:
+
+- open: ifcopenshell.open
+- profiles: get_rooms with footprints read from the extruded profiles
+- tessellation: the geometry iterator over all IfcSpaces
+- footprints: get_boundaries on every tessellated shape
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+from corridors import REPO_DIR
+from ifc_corpus import corpus_file_name
+from tracing import get_peak_rss
+
+DEFAULT_CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+
+
+def measure_file(path, workers) -> dict:
+    """Runs every load stage on one model, in the current process"""
+    import ifcopenshell
+    import ifcopenshell.geom
+    from get_room_geom import get_boundaries, get_geom_settings, get_rooms
+
+    result = {"file": path, "size_bytes": os.path.getsize(path), "workers": workers}
+
+    started = time.perf_counter()
+    model = ifcopenshell.open(path)
+    result["open_seconds"] = time.perf_counter() - started
+    result["peak_rss_after_open"] = get_peak_rss()
+    spaces = model.by_type("IfcSpace")
+    result["spaces"] = len(spaces)
+
+    started = time.perf_counter()
+    rooms = get_rooms(model, workers, use_profiles=True)
+    result["profiles_seconds"] = time.perf_counter() - started
+    result["rooms"] = len(rooms)
+    del rooms
+
+    started = time.perf_counter()
+    shapes = []
+    iterator = ifcopenshell.geom.iterator(get_geom_settings(), model, workers, include=spaces)
+    if spaces and iterator.initialize():
+        while True:
+            shapes.append(iterator.get())
+            if not iterator.next():
+                break
+    result["tessellation_seconds"] = time.perf_counter() - started
+    result["shapes"] = len(shapes)
+
+    started = time.perf_counter()
+    footprints = 0
+    for shape in shapes:
+        try:
+            get_boundaries(shape)
+            footprints += 1
+        except ValueError:
+            pass
+    result["footprints_seconds"] = time.perf_counter() - started
+    result["footprints"] = footprints
+    result["peak_rss"] = get_peak_rss()
+    return result
+
+
+def measure_in_subprocess(path, workers) -> dict:
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", path, "--workers", str(workers)],
+        capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def rate(count, seconds) -> str:
+    return f"{count / seconds:,.0f}/s" if seconds > 0 else "-"
+
+
+def print_result(result) -> None:
+    peak = result["peak_rss"]
+    print(
+        f"{result['spaces']:>7} {result['size_bytes'] / 1e6:>8.1f} {result['open_seconds']:>8.2f} "
+        f"{rate(result['rooms'], result['profiles_seconds']):>12} "
+        f"{rate(result['shapes'], result['tessellation_seconds']):>12} "
+        f"{rate(result['footprints'], result['footprints_seconds']):>12} "
+        f"{peak / 1e6 if peak else float('nan'):>9.0f}  {os.path.basename(result['file'])}"
+    )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark loading IFC models.")
+    parser.add_argument("files", nargs="*", help="IFC files to measure instead of the generated corpus")
+    parser.add_argument("--spaces", type=int, nargs="+", default=[100, 1000, 5000, 20000])
+    parser.add_argument("--storeys", type=int, default=4)
+    parser.add_argument("--vertices", type=int, default=8)
+    parser.add_argument("--boundaries", action="store_true", help="generate models with space boundaries")
+    parser.add_argument("--corpus-dir", default=DEFAULT_CORPUS_DIR)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="geometry iterator threads")
+    parser.add_argument("-o", "--output", default="load_bench.json", help="JSON file for the results")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(measure_file(args.child, args.workers)))
+        return 0
+
+    files = args.files
+    if not files:
+        from ifc_corpus import make_model
+
+        os.makedirs(args.corpus_dir, exist_ok=True)
+        for spaces in args.spaces:
+            path = os.path.join(
+                args.corpus_dir, corpus_file_name(spaces, args.storeys, args.vertices, args.boundaries)
+            )
+            if not os.path.exists(path):
+                print(f"Generating {path}")
+                make_model(spaces, args.storeys, args.vertices, args.boundaries).write(path)
+            files.append(path)
+
+    print(f"{'spaces':>7} {'MB':>8} {'open s':>8} {'profiles':>12} {'tessellate':>12} {'footprints':>12} {'peak MB':>9}")
+    results = []
+    for path in files:
+        result = measure_in_subprocess(path, args.workers)
+        results.append(result)
+        print_result(result)
+
+    report = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "repo": REPO_DIR,
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""
+Startup time budget of the GUI and the headless CLI.
+
+    python benchmarks/startup.py [--repeat 5]
+
+Every entry point is started in a fresh interpreter, outside the repository folder.
+The best time of the repeats must stay within its budget, and none of the listed
+heavy libraries may be loaded before they are needed. Exits with 1 when a budget is missed.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ("ifcopenshell", "matplotlib", "reportlab", "PIL")
+
+# name: (code timed in the child, budget in seconds, modules that must not be loaded)
+ENTRY_POINTS = {
+    "gui import": ("import app", 0.5, HEAVY_MODULES),
+    "gui window": ("import app; window = app.Application(); window.update(); window.destroy()", 1.0, HEAVY_MODULES),
+    "cli import": ("import afu_cli", 0.5, HEAVY_MODULES + ("tkinter",)),
+}
+
+CHILD_CODE = """
+import json, sys, time
+started = time.perf_counter()
+sys.path.insert(0, {repo!r})
+try:
+    exec({code!r})
+except Exception as e:
+    print(json.dumps({{"skipped": f"{{type(e).__name__}}: {{e}}"}}))
+else:
+    seconds = time.perf_counter() - started
+    print(json.dumps({{"seconds": seconds, "modules": sorted(sys.modules)}}))
+"""
+
+
+def measure(code: str) -> dict:
+    with tempfile.TemporaryDirectory() as work_dir:
+        output = subprocess.run(
+            [sys.executable, "-c", CHILD_CODE.format(repo=REPO_DIR, code=code)],
+            cwd=work_dir, capture_output=True, text=True, check=True,
+        ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Check the startup time budget of the entry points.")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per entry point")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for name, (code, budget, forbidden) in ENTRY_POINTS.items():
+        runs = [measure(code) for _ in range(args.repeat)]
+        if "skipped" in runs[0]:
+            print(f"{name:<12} skipped ({runs[0]['skipped']})")
+            continue
+
+        best = min(run["seconds"] for run in runs)
+        loaded = sorted({module.split(".")[0] for module in runs[0]["modules"]} & set(forbidden))
+        ok = best <= budget and not loaded
+        failed |= not ok
+        print(f"{name:<12} {best * 1000:7.1f} ms (budget {budget * 1000:.0f} ms) {'ok' if ok else 'FAILED'}")
+        if loaded:
+            print(f"{'':<12} loaded at startup: {', '.join(loaded)}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
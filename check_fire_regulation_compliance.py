@@ -1,22 +1,12 @@
-import ifcopenshell
-import ifcopenshell.geom
-
 ### Import the custom functions
-from geometry import (
-    find_shortest_line,
-    perpendicular_lines_from_vector,
-)
+from width_solver import ADAPTIVE_TOLERANCE, SAMPLED, min_width_line
 
-from typing import List
+import tracing
+from typing import Iterator, List
 from room import Room
 from fire_check_results import FireCheckResults 
-
-# Load the IFC model
-model = ifcopenshell.open("Music_box_Reference_view.ifc")
-
-# Set up geometry settings
-settings = ifcopenshell.geom.settings()
-settings.set(settings.USE_WORLD_COORDS, True)
+from parallel_width import iter_min_width_lines
+from width_memo import WidthCache, WidthMemo
 
 def get_room_compliance(calculated_width, min_required_width, is_public):
 
@@ -30,50 +20,60 @@ def get_room_compliance(calculated_width, min_required_width, is_public):
 
     return compliance
 
-def check_fire_regulation(rooms:List[Room], is_public, use_category):
+def get_room_result(room: Room, shortest_line, is_public, use_category):
+    """Rules of one escape route room for its calculated width line, returns (compliance, calculated width, required width)"""
+    calculated_min_corr_width = round(float(shortest_line.length), 2)
+
+    min_width_fire = room.get_required_min_width_fire(use_category) 
+    
+    room_compliance = get_room_compliance(calculated_min_corr_width, min_width_fire, is_public)
+    return room_compliance, calculated_min_corr_width, min_width_fire
+
+def check_room(room: Room, is_public, use_category, method=SAMPLED, tolerance=ADAPTIVE_TOLERANCE):
+    """Width analysis and rules of one escape route room, returns (compliance, calculated width, required width)"""
+    shortest_line = min_width_line(room.boundaries, method, tolerance=tolerance)
+    return get_room_result(room, shortest_line, is_public, use_category)
+
+def iter_fire_regulation(rooms:List[Room], is_public, use_category, method=SAMPLED, tolerance=ADAPTIVE_TOLERANCE, result=None, workers=1, cache: WidthCache = None) -> Iterator[Room]:
+    """
+    Checks the escape route rooms one by one, adding each to `result` and yielding the room when it is done.
+    With more than one worker the width analysis runs in a process pool, results still arrive in room order.
+    The width line is computed once per room shape, rooms of the same shape reuse it.
+    Rooms whose line is in `cache` from an earlier check with the same width settings only run the rules.
+    """
+    if result is None:
+        result = FireCheckResults()
+    result.is_public = is_public
+
+    escape_route_rooms = [room for room in rooms if room.is_part_of_escape_route]
+    memo = WidthMemo()
+    cache_hits = cache.hits if cache is not None else 0
+    shortest_lines = iter_min_width_lines(escape_route_rooms, method, tolerance, workers, memo, cache)
+
+    try:
+        for room in escape_route_rooms:
+            # With worker processes this is the wait for the room's result
+            with tracing.span("check.width", room=room.name, method=method):
+                shortest_line = next(shortest_lines)
+            result.set_width_counts(memo.misses, memo.hits, cache.hits - cache_hits if cache is not None else 0)
+            with tracing.span("check.rules", room=room.name):
+                room_compliance, calculated_min_corr_width, min_width_fire = get_room_result(
+                    room, shortest_line, is_public, use_category
+                )
+            result.add_room(room)
+            result.add_room_compliance(room_compliance)
+            result.add_calculated_width(calculated_min_corr_width)
+            result.add_min_required_width(min_width_fire)
+            yield room
+    finally:
+        # Stops the worker processes when the caller closes this generator early
+        shortest_lines.close()
+
+def check_fire_regulation(rooms:List[Room], is_public, use_category, method=SAMPLED, tolerance=ADAPTIVE_TOLERANCE, workers=1, cache: WidthCache = None):
     result = FireCheckResults()
-
-    for room in rooms:
-        
-        if not room.is_part_of_escape_route:
-            continue
-
-        selected_boundaries = room.boundaries
-
-        # Convert boundary lines to walls
-        walls = []
-        for boundary in selected_boundaries:
-            walls.append((boundary.start, boundary.end))
-
-        # Define number of points and offset to cut the boundary lines
-        offset = 0.1
-        all_perpendicular_lines_list = []
-
-        for boundary in selected_boundaries:
-            num_points = boundary.get_number_of_points_along_line()
-            boundary_x_values = boundary.get_x_vals()
-            boundary_y_values = boundary.get_y_vals()
-
-            perpendicular_lines_list = perpendicular_lines_from_vector(
-                boundary, num_points, walls, offset
-            )
-            all_perpendicular_lines_list.extend(perpendicular_lines_list)
-
-        shortest_line = find_shortest_line(
-            [line for line in all_perpendicular_lines_list if line.length > 0.3] #TODO: 0.3 parameter comes from user.
-        )
-        calculated_min_corr_width = round(float(shortest_line.length), 2)
-
-
-        min_width_fire = room.get_required_min_width_fire(use_category) 
-        
-        room_compliance = get_room_compliance(calculated_min_corr_width, min_width_fire, is_public)
-        result.add_room_compliance(room_compliance)
-        result.add_calculated_width(calculated_min_corr_width)
-        result.min_required_width = min_width_fire
-        result.is_public = is_public
-        print(f"Room {room.name} compliance: {room_compliance}")
-
+    with tracing.span("check_fire_regulation", method=method, workers=workers):
+        for _ in iter_fire_regulation(rooms, is_public, use_category, method, tolerance, result, workers, cache):
+            pass
     return result
 
       
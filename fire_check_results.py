@@ -2,10 +2,20 @@
 class FireCheckResults:
 
     def __init__(self):
+        # The checked rooms, in the order of the other lists
+        self.rooms = []
         self.compliance_list = []
         self.calculated_width_list = []
         self.min_required_width = 0
+        self.min_required_width_list = []
         self.is_public = False
+        # Width lines computed, reused from an earlier room of the same shape, and kept from an earlier check
+        self.computed_widths = 0
+        self.reused_widths = 0
+        self.cached_widths = 0
+
+    def add_room(self, room):
+        self.rooms.append(room)
 
     def add_room_compliance(self, compliance):
         self.compliance_list.append(compliance)
@@ -13,6 +23,20 @@ class FireCheckResults:
     def add_calculated_width(self, calculated_width):
         self.calculated_width_list.append(calculated_width)
 
+    def add_min_required_width(self, min_required_width):
+        self.min_required_width_list.append(min_required_width)
+        self.min_required_width = min_required_width
+
+    def set_width_counts(self, computed_widths, reused_widths, cached_widths=0):
+        self.computed_widths = computed_widths
+        self.reused_widths = reused_widths
+        self.cached_widths = cached_widths
+
+    def get_width_summary(self):
+        return (f"Width computed for {self.computed_widths} room shapes, "
+                f"reused for {self.reused_widths} rooms of the same shape, "
+                f"{self.cached_widths} rooms unchanged since the last check")
+
     def get_result_messages(self):
         result_messages = []
         for index, compliance in enumerate(self.compliance_list):
@@ -22,17 +46,18 @@ class FireCheckResults:
     def get_result_message(self, compliance, index):
         message_color = "black"  
         recommended = 2 if self.is_public else 1.5
+        min_required_width = self.min_required_width_list[index] if index < len(self.min_required_width_list) else self.min_required_width
         if compliance == 1:
             long_message = (f"Corridor is wide enough according to BR18. "
-                        f"Required width is {self.min_required_width} m.\n"
+                        f"Required width is {min_required_width} m.\n"
                         f"But it is not compliant with Universal Design principles. "
                         f"The recommended corridor width is {recommended} m.")
             room_color = "yellow"
         elif compliance == 2:
-            long_message = f"Corridor is wide enough. Required width is {self.min_required_width} m."
+            long_message = f"Corridor is wide enough. Required width is {min_required_width} m."
             room_color = "green"
         else:
-            long_message = f"Corridor is not wide enough! Required width is {self.min_required_width} m!"
+            long_message = f"Corridor is not wide enough! Required width is {min_required_width} m!"
             message_color = "red"
             room_color = "red"
         message = f"Calculated width: {self.calculated_width_list[index]} m"
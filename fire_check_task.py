@@ -0,0 +1,41 @@
+import tracing
+from background import BackgroundTask
+from check_fire_regulation_compliance import iter_fire_regulation
+from fire_check_results import FireCheckResults
+from width_solver import ADAPTIVE_TOLERANCE, SAMPLED
+
+
+class FireCheckTask(BackgroundTask):
+    """
+    Runs the fire regulation check off the UI thread.
+
+    Messages: ("room", (room, result message)) as soon as each escape route room is checked,
+    and finally ("done", FireCheckResults), ("cancelled", partial FireCheckResults) or ("error", message).
+    """
+    def __init__(self, rooms, is_public, use_category, method=SAMPLED, tolerance=ADAPTIVE_TOLERANCE, workers=1, cache=None):
+        super().__init__()
+        self.rooms = rooms
+        self.is_public = is_public
+        self.use_category = use_category
+        self.method = method
+        self.tolerance = tolerance
+        self.workers = workers
+        # Width lines kept between checks, only this task uses it while it runs
+        self.cache = cache
+        self.result = FireCheckResults()
+
+    def work(self) -> None:
+        result = self.result
+        checked_rooms = iter_fire_regulation(
+            self.rooms, self.is_public, self.use_category, self.method, self.tolerance, result, self.workers,
+            self.cache,
+        )
+        with tracing.span("check_fire_regulation", method=self.method, workers=self.workers):
+            for index, room in enumerate(checked_rooms):
+                self.post("room", (room, result.get_result_message(result.compliance_list[index], index)))
+                if self.is_cancelled():
+                    # Closing the generator stops the worker processes
+                    checked_rooms.close()
+                    self.post("cancelled", result)
+                    return
+        self.post("done", result)
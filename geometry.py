@@ -1,10 +1,10 @@
 import numpy as np
-import matplotlib.pyplot as plt
 from dataclasses import dataclass
 
 
 @dataclass
 class Line:
+    __slots__ = ("start", "end", "length")
     start: tuple
     end: tuple
     length: float
@@ -147,7 +147,79 @@ def perpendicular_lines(x_values, y_values, num_points, walls):
 
 
 
-def perpendicular_lines_from_vector(vector, num_points, walls, offset_ratio):
+def walls_to_array(walls):
+    # Stack (start, end) wall pairs into one (M, 2, 2) array for batched ray casting
+    walls = np.asarray(walls, dtype=float)
+    return walls.reshape(-1, 2, 2)
+
+
+#Intersect rays with segments element-wise (inputs broadcast against each other).
+#Returns the intersection points and their distances, with inf where the ray misses.
+#Follows the same rules as intersect_ray_with_segment, and hits on the ray origin itself are ignored.
+def ray_segment_distances(origin, ray_dir, seg_start, seg_vec):
+    v1 = origin - seg_start
+    v3 = np.stack([-ray_dir[..., 1], ray_dir[..., 0]], axis=-1)
+    dot = np.sum(seg_vec * v3, axis=-1)
+    parallel = np.abs(dot) < 1e-8
+    dot = np.where(parallel, 1.0, dot)
+
+    cross = seg_vec[..., 0] * v1[..., 1] - seg_vec[..., 1] * v1[..., 0]
+    t1 = cross / dot
+    t2 = np.sum(v1 * v3, axis=-1) / dot
+    valid = ~parallel & (t1 >= 0) & (t2 >= 0) & (t2 <= 1)
+
+    intersection = origin + t1[..., None] * ray_dir
+    # Same tolerance as np.allclose(intersection, point)
+    at_origin = np.all(np.abs(intersection - origin) <= 1e-8 + 1e-5 * np.abs(origin), axis=-1)
+    valid &= ~at_origin
+
+    distance = np.where(valid, np.linalg.norm(intersection - origin, axis=-1), np.inf)
+    return intersection, distance
+
+
+def normalize_rays(origins, direction):
+    origins = np.asarray(origins, dtype=float).reshape(-1, 2)
+    direction = np.broadcast_to(np.asarray(direction, dtype=float), origins.shape)
+    return origins, direction / np.linalg.norm(direction, axis=1)[:, None]
+
+
+#Cast all rays against all walls in one broadcast and return the nearest hit of each ray.
+#With return_segments the id of the hit wall is returned as well, -1 for rays that hit nothing.
+def cast_rays(origins, direction, walls, chunk_size=1_000_000, return_segments=False):
+    origins, direction = normalize_rays(origins, direction)
+    walls = walls_to_array(walls)
+
+    hits = np.full(origins.shape, np.nan)
+    distances = np.full(len(origins), np.inf)
+    segments = np.full(len(origins), -1)
+    if len(walls) == 0 or len(origins) == 0:
+        return (hits, distances, segments) if return_segments else (hits, distances)
+
+    seg_start = walls[:, 0]
+    seg_vec = walls[:, 1] - walls[:, 0]
+
+    # Process the rays in chunks so the (points x walls) arrays stay bounded in memory
+    rows = max(1, chunk_size // len(walls))
+    for first in range(0, len(origins), rows):
+        intersection, distance = ray_segment_distances(
+            origins[first:first + rows, None, :],
+            direction[first:first + rows, None, :],
+            seg_start,
+            seg_vec,
+        )
+        nearest = np.argmin(distance, axis=1)
+        rows_idx = np.arange(len(nearest))
+        found = np.isfinite(distance[rows_idx, nearest])
+
+        chunk_hits = intersection[rows_idx, nearest]
+        hits[first:first + rows][found] = chunk_hits[found]
+        distances[first:first + rows] = distance[rows_idx, nearest]
+        segments[first:first + rows] = np.where(found, nearest, -1)
+
+    return (hits, distances, segments) if return_segments else (hits, distances)
+
+
+def perpendicular_lines_from_vector(vector, num_points, walls, offset_ratio, index=None):
     # """
     # Given a vector, draws lines to the left side at evenly spaced intervals.
     # Starts slightly after the vector's start point to avoid immediate intersection.
@@ -177,36 +249,67 @@ def perpendicular_lines_from_vector(vector, num_points, walls, offset_ratio):
     points = cut_up_line(x_values, y_values, num_points)
     #print(f"Cut {len(points)} points from adjusted vector")
 
+    # Cast every ray of this vector at once, through the room's segment index when there is one
+    if index is not None:
+        hits, distances = index.cast_rays(points, left_dir)
+    else:
+        hits, distances = cast_rays(points, left_dir, walls)
+
     perpendiculars = []
 
-    for point in points:
-        ray_end = point + left_dir * 9999999999999999  # arbitrary large length to find wall
-        closest_intersection = None
-        min_distance = np.inf
-
-        # Check against all walls
-        for wall_start, wall_end in walls:
-            intersection = intersect_ray_with_segment(point, ray_end, wall_start, wall_end)
-            
-            # Check if the intersection is the same as the ray's starting point
-            if intersection is not None and not np.allclose(intersection, point):
-                distance = np.linalg.norm(intersection - point)
-                if distance < min_distance:
-                    min_distance = distance
-                    closest_intersection = intersection
-
-        if closest_intersection is not None:
-            line_start = point
-            line_end = closest_intersection
-            line_length = np.linalg.norm(line_end - line_start)
-            perpendiculars.append(Line(start=tuple(line_start), end=tuple(line_end), length=line_length))
-        else:
-                print(f"No intersection found to the left from point {point}")
+    for point, hit, distance in zip(points, hits, distances):
+        # Rays that leave the room through a gap in the boundary have no line
+        if np.isfinite(distance):
+            perpendiculars.append(Line(start=tuple(point), end=tuple(hit), length=distance))
 
     #print(f"Found {len(perpendiculars)} left-side perpendicular lines")
     return perpendiculars
 
 
+def simplify_polyline(points, tolerance):
+    """Douglas-Peucker: indices of the points to keep so no point is further than `tolerance` from the result"""
+    keep = np.zeros(len(points), dtype=bool)
+    keep[[0, -1]] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        start = points[first]
+        chord = points[last] - start
+        offsets = points[first + 1:last] - start
+        chord_length = np.hypot(chord[0], chord[1])
+        if chord_length > 0:
+            distances = np.abs(chord[0] * offsets[:, 1] - chord[1] * offsets[:, 0]) / chord_length
+        else:
+            distances = np.hypot(offsets[:, 0], offsets[:, 1])
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance:
+            split = first + 1 + farthest
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+    return np.flatnonzero(keep)
+
+def simplify_ring(ring, tolerance):
+    """
+    Closed ring (N, 2) simplified with Douglas-Peucker, split at the point farthest from the first one.
+    At least three corners are kept, so a small room does not collapse into a line.
+    """
+    if len(ring) <= 4:
+        return ring
+    split = int(np.argmax(np.hypot(*(ring - ring[0]).T)))
+    first = simplify_polyline(ring[:split + 1], tolerance)
+    second = simplify_polyline(np.vstack([ring[split:], ring[:1]]), tolerance) + split
+    indices = np.concatenate([first, second[1:-1]])
+    if len(indices) < 3:
+        # Add the point farthest from the line through the two that are left
+        chord = ring[split] - ring[0]
+        offsets = ring - ring[0]
+        third = int(np.argmax(np.abs(chord[0] * offsets[:, 1] - chord[1] * offsets[:, 0])))
+        indices = np.unique(np.append(indices, third))
+    return ring[indices]
+
 def find_shortest_line(lines):
     return min(lines, key=lambda line: line.length)
 
@@ -214,6 +317,8 @@ def find_longest_line(lines):
     return max(lines, key=lambda line: line.length)
 
 if __name__ == "__main__":
+    import matplotlib.pyplot as plt
+
     #Create walls
     walls = [
         (np.array([2, 0]), np.array([2, 10])),
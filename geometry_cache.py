@@ -0,0 +1,166 @@
+"""
+On-disk cache of the rooms extracted from IFC files.
+
+Entries are kept per file, not per space: the key is the SHA-256 of the file content
+and the geometry settings, and one entry holds every space of the file. A GlobalId does
+not tell whether a space's geometry changed when the file changed, since its placement,
+profile or openings live in other entities, so per-space entries would need a hash of
+each space's entity graph. With per-file entries a warm reopen of an unchanged file is
+one memory-mapped store, at the cost that any change to the file extracts every space
+again.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import tracing
+from typing import List, Optional
+from room import Room
+from room_store import RoomStore
+
+# Default size limit of the cache directory
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def get_default_cache_dir() -> str:
+    if os.environ.get("AFU_CACHE_DIR"):
+        return os.environ["AFU_CACHE_DIR"]
+    if os.environ.get("LOCALAPPDATA"):  # Windows
+        return os.path.join(os.environ["LOCALAPPDATA"], "afu_tool", "cache")
+    return os.path.join(os.path.expanduser("~"), ".cache", "afu_tool")
+
+
+def hash_file(file_path, chunk_size=1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class GeometryCache:
+    """
+    On-disk cache of the rooms extracted from IFC files.
+
+    Each entry is a RoomStore directory with the boundaries of every space of one file,
+    keyed by the SHA-256 of the file content plus the geometry settings fingerprint.
+    Loaded rooms are views into the memory-mapped store. The least recently used entries
+    are deleted once the directory exceeds max_bytes.
+    """
+    INDEX_FILE = "index.json"
+
+    def __init__(self, directory: str = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory or get_default_cache_dir()
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def _iter_entries(self):
+        """Paths of the entry directories, without stores that are still being written"""
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if os.path.isdir(path) and not name.endswith(".tmp"):
+                yield path
+
+    def _read_index(self) -> dict:
+        try:
+            with open(os.path.join(self.directory, self.INDEX_FILE)) as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_index(self, index: dict) -> None:
+        path = os.path.join(self.directory, self.INDEX_FILE)
+        with tempfile.NamedTemporaryFile("w", dir=self.directory, delete=False, suffix=".tmp") as file:
+            json.dump(index, file)
+        os.replace(file.name, path)
+
+    def get_file_hash(self, file_path) -> str:
+        """Content hash of the file, reused while its size and modification time are unchanged"""
+        path = os.path.abspath(file_path)
+        stat = os.stat(path)
+        index = self._read_index()
+        known = index.get(path)
+        if known and known["size"] == stat.st_size and known["mtime_ns"] == stat.st_mtime_ns:
+            return known["sha256"]
+
+        file_hash = hash_file(path)
+        index[path] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": file_hash}
+        self._write_index(index)
+        return file_hash
+
+    def get_key(self, file_path, settings_fingerprint: str) -> str:
+        file_hash = self.get_file_hash(file_path)
+        return hashlib.sha256(f"{file_hash}|{settings_fingerprint}".encode()).hexdigest()
+
+    def load(self, key: str) -> Optional[List[Room]]:
+        with tracing.span("cache.load"):
+            return self._load(key)
+
+    def _load(self, key: str) -> Optional[List[Room]]:
+        path = self._entry_path(key)
+        if not os.path.isdir(path):
+            return None
+        try:
+            store = RoomStore.open(path)
+            rooms = store.get_rooms()
+        except (OSError, KeyError, ValueError) as e:
+            print(f"Ignoring unreadable cache entry {path}: {e}")
+            return None
+
+        # Mark the entry as recently used for the eviction order
+        os.utime(path)
+        return rooms
+
+    def store(self, key: str, rooms: List[Room]) -> None:
+        with tracing.span("cache.store"):
+            self._store(key, rooms)
+
+    def _store(self, key: str, rooms: List[Room]) -> None:
+        path = self._entry_path(key)
+        if os.path.isdir(path):
+            return
+        try:
+            RoomStore.from_rooms(rooms).write(path)
+        except OSError:
+            # Another process stored the same entry first
+            if not os.path.isdir(path):
+                raise
+        self.evict()
+
+    def evict(self) -> None:
+        """Deletes the least recently used entries until the cache fits in max_bytes"""
+        entries = []
+        for path in self._iter_entries():
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, get_entry_size(path), path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                remove_entry(path)
+            except OSError as e:
+                # Windows does not delete files that are still memory-mapped
+                print(f"Could not delete cache entry {path}: {e}")
+                continue
+            total -= size
+
+    def clear(self) -> None:
+        for path in self._iter_entries():
+            remove_entry(path)
+        index = os.path.join(self.directory, self.INDEX_FILE)
+        if os.path.exists(index):
+            os.remove(index)
+
+
+def get_entry_size(path) -> int:
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def remove_entry(path) -> None:
+    shutil.rmtree(path)
@@ -1,19 +1,38 @@
-import ifcopenshell
-import ifcopenshell.geom
-import ifcopenshell.util.selector
-import matplotlib.pyplot as plt
 import numpy as np
+import os
+import time
+import tracing
 from room import Room
-from vector import Vector
-from typing import List
+from vector import RingBoundaries, Vector
+from typing import Iterator, List, Optional
 # Load the IFC model
 #model = ifcopenshell.open("Music_box_IFC4_Reference_view_highLoD.ifc")
 
-# Set up geometry settings
-settings = ifcopenshell.geom.settings()
-settings.set(settings.USE_WORLD_COORDS, True)
+# Geometry settings, created on first use so that importing this module does not load ifcopenshell
+USE_WORLD_COORDS = True
+settings = None
+
+def get_geom_settings():
+    global settings
+    if settings is None:
+        import ifcopenshell.geom
+
+        settings = ifcopenshell.geom.settings()
+        settings.set(settings.USE_WORLD_COORDS, USE_WORLD_COORDS)
+    return settings
+
+# Vertices within this height above the lowest vertex belong to the floor (metres)
+FLOOR_Z_TOLERANCE = 1e-4
+
+# Vertices closer than this are treated as the same point (metres)
+WELD_TOLERANCE = 1e-6
+
+# Bump when the footprint extraction changes, so cached rooms from older versions are not reused
+FOOTPRINT_VERSION = 2
 
 if __name__ == "__main__":
+    import matplotlib.pyplot as plt
+
     # Prepare plot
     plt.figure(figsize=(10, 8))
     plt.title("2D Room boundariess from IfcSpace geometry")
@@ -23,62 +42,349 @@ if __name__ == "__main__":
 
 
 def draw_plt():
+    import matplotlib.pyplot as plt
+
     plt.legend()
     plt.axis("equal")
     plt.tight_layout()
     plt.show()
 
-def get_boundaries(shape) -> List[Vector]:
+def weld_vertices(points, tolerance):
+    # Merge vertices closer than the tolerance, returns the unique points and each vertex's new index
+    keys = np.round(points / tolerance).astype(np.int64)
+    _, first, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+    return points[first], inverse.reshape(-1)
+
+def chain_rings(edges) -> List[np.ndarray]:
+    """Chains directed boundary edges (a, b) into closed rings of vertex indices"""
+    outgoing = {}
+    for a, b in edges.tolist():
+        outgoing.setdefault(a, []).append(b)
+
+    rings = []
+    while outgoing:
+        start = next(iter(outgoing))
+        ring = [start]
+        current = start
+        while True:
+            targets = outgoing.get(current)
+            if not targets:
+                break
+            following = targets.pop()
+            if not targets:
+                del outgoing[current]
+            if following == start:
+                break
+            ring.append(following)
+            current = following
+        if len(ring) >= 3:
+            rings.append(np.array(ring))
+    return rings
+
+def signed_area(points) -> float:
+    x, y = points[:, 0], points[:, 1]
+    return (np.dot(x, np.roll(y, -1)) - np.dot(np.roll(x, -1), y)) / 2
+
+def point_in_ring(point, ring) -> bool:
+    """Even-odd test of a point against a closed (N, 2) ring"""
+    x, y = point
+    start = ring
+    end = np.roll(ring, -1, axis=0)
+    crosses = (start[:, 1] > y) != (end[:, 1] > y)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        crossing_x = start[:, 0] + (y - start[:, 1]) * (end[:, 0] - start[:, 0]) / (end[:, 1] - start[:, 1])
+    return bool(np.count_nonzero(crosses & (crossing_x > x)) % 2)
+
+def remove_collinear_points(points, tolerance=1e-9):
+    # Drop vertices that only split a straight edge, as tessellations often do
+    previous = points - np.roll(points, 1, axis=0)
+    following = np.roll(points, -1, axis=0) - points
+    cross = previous[:, 0] * following[:, 1] - previous[:, 1] * following[:, 0]
+    scale = np.linalg.norm(previous, axis=1) * np.linalg.norm(following, axis=1)
+    straight = (np.abs(cross) <= tolerance * scale) & (np.sum(previous * following, axis=1) > 0)
+    return points[~straight]
+
+def get_boundaries(shape, z_tolerance=FLOOR_Z_TOLERANCE) -> List[Vector]:
+    """
+    Floor outline of a tessellated shape, counter-clockwise, with its holes clockwise.
+    Uses the floor triangles of the mesh: their edges that are not shared by two
+    floor triangles form the outline, and are chained into ordered rings.
+    """
     verts = np.array(shape.geometry.verts).reshape(-1, 3)
+    faces = np.array(shape.geometry.faces, dtype=int).reshape(-1, 3)
 
-    # Get lowest Z level (floor level)
+    # Floor triangles: all three corners at the lowest Z level (floor level)
     min_z = np.min(verts[:, 2])
+    on_floor = verts[:, 2] <= min_z + z_tolerance
+    floor = faces[on_floor[faces].all(axis=1)]
+
+    # Triangles may not share vertex indices, so weld them by position first
+    points, welded = weld_vertices(verts[:, :2], WELD_TOLERANCE)
+    floor = welded[floor]
+    floor = floor[(floor[:, 0] != floor[:, 1]) & (floor[:, 1] != floor[:, 2]) & (floor[:, 0] != floor[:, 2])]
+
+    # Edges used by exactly one floor triangle are on the outline
+    edges = np.concatenate([floor[:, [0, 1]], floor[:, [1, 2]], floor[:, [2, 0]]])
+    _, inverse, counts = np.unique(np.sort(edges, axis=1), axis=0, return_inverse=True, return_counts=True)
+    outline = edges[counts[inverse.reshape(-1)] == 1]
+
+    rings = [points[ring] for ring in chain_rings(outline)]
+    if not rings:
+        raise ValueError("Shape has no floor outline")
+
+    # The largest ring is the outer boundary, the rings inside it are holes such as columns and
+    # shafts. Their walls narrow the room like any other wall. Rings outside it are other pieces
+    # of the floor and are ignored.
+    outer_index = max(range(len(rings)), key=lambda i: abs(signed_area(rings[i])))
+    outer = rings[outer_index]
+    if signed_area(outer) < 0:
+        outer = outer[::-1]
+
+    holes = []
+    for i, ring in enumerate(rings):
+        if i == outer_index or not point_in_ring(ring[0], outer):
+            continue
+        if signed_area(ring) > 0:
+            ring = ring[::-1]
+        ring = remove_collinear_points(ring)
+        if len(ring) >= 3:
+            holes.append(ring)
+
+    return points_to_vectors(remove_collinear_points(outer), holes)
+
+def open_ring(points):
+    # The ring closes itself, drop a repeated first point
+    points = np.asarray(points, dtype=float)
+    if len(points) > 1 and np.array_equal(points[0], points[-1]):
+        points = points[:-1]
+    return np.ascontiguousarray(points)
+
+def points_to_vectors(points, holes=()) -> List[Vector]:
+    # The Vectors are made from the rings when they are used
+    return RingBoundaries(open_ring(points), [open_ring(hole) for hole in holes])
+
+def get_profile_points(profile) -> Optional[np.ndarray]:
+    """2D outline of a swept-area profile in profile coordinates, None if the profile type is not supported"""
+    import ifcopenshell.util.placement
+
+    # Subtypes (hollow and rounded rectangles) are tessellated
+    if profile.is_a() == "IfcRectangleProfileDef":
+        half_x = profile.XDim / 2
+        half_y = profile.YDim / 2
+        points = np.array([[-half_x, -half_y], [half_x, -half_y], [half_x, half_y], [-half_x, half_y]])
+        if profile.Position:
+            matrix = ifcopenshell.util.placement.get_axis2placement(profile.Position)
+            points = points @ matrix[:2, :2].T + matrix[:2, 3]
+        return points
+
+    if not profile.is_a("IfcArbitraryClosedProfileDef"):
+        return None
+    return get_curve_points(profile.OuterCurve)
+
+def get_profile_voids(profile) -> Optional[List[np.ndarray]]:
+    """Inner curves of a profile with voids in profile coordinates, None if one of them is not supported"""
+    if not profile.is_a("IfcArbitraryProfileDefWithVoids"):
+        return []
+    voids = [get_curve_points(curve) for curve in profile.InnerCurves]
+    if any(void is None or len(void) < 3 for void in voids):
+        return None
+    return voids
+
+def get_curve_points(curve) -> Optional[np.ndarray]:
+    """2D corners of a closed profile curve, None if the curve type is not supported"""
+    if curve.is_a("IfcPolyline"):
+        return np.array([point.Coordinates[:2] for point in curve.Points], dtype=float)
+    if curve.is_a("IfcIndexedPolyCurve"):
+        # Arc segments need tessellation
+        if curve.Segments and any(not segment.is_a("IfcLineIndex") for segment in curve.Segments):
+            return None
+        coordinates = np.array(curve.Points.CoordList, dtype=float)[:, :2]
+        if not curve.Segments:
+            return coordinates
+        indices = []
+        for segment in curve.Segments:
+            for index in segment.wrappedValue:
+                if not indices or indices[-1] != index:
+                    indices.append(index)
+        return coordinates[np.array(indices) - 1]
+    return None
 
-    # Extract (x, y) points at the base
-    boundaries = verts[verts[:, 2] == min_z][:, :2]
-
-    # Close the loop if not already
-    if not np.array_equal(boundaries[0], boundaries[-1]):
-        boundaries = np.vstack([boundaries, boundaries[0]])
-
-    # Convert points to Vector objects
-    vectors = []
-    for i in range(len(boundaries) - 1):
-        start = tuple(boundaries[i])
-        end = tuple(boundaries[i + 1])
-        vectors.append(Vector(start, end))
-
-    return vectors
+def get_profile_boundaries(space, unit_scale) -> Optional[List[Vector]]:
+    """
+    Reads the footprint straight from a vertically extruded IfcExtrudedAreaSolid, in world coordinates.
+    Returns None for any shape that has to be tessellated instead.
+    """
+    if not space.Representation:
+        return None
+
+    solids = []
+    for representation in space.Representation.Representations:
+        if representation.RepresentationIdentifier not in (None, "Body"):
+            continue
+        solids.extend(representation.Items)
+    if len(solids) != 1 or not solids[0].is_a("IfcExtrudedAreaSolid"):
+        return None
+    solid = solids[0]
+
+    # Voids (columns, shafts) become holes, a profile with a void that cannot be read is tessellated
+    points = get_profile_points(solid.SweptArea)
+    voids = get_profile_voids(solid.SweptArea)
+    if points is None or len(points) < 3 or voids is None:
+        return None
+
+    # Profile plane to world coordinates
+    import ifcopenshell.util.placement
+
+    matrix = np.eye(4)
+    if space.ObjectPlacement:
+        matrix = ifcopenshell.util.placement.get_local_placement(space.ObjectPlacement)
+    if solid.Position:
+        matrix = matrix @ ifcopenshell.util.placement.get_axis2placement(solid.Position)
+
+    # The profile is only the footprint when it lies flat and is extruded vertically
+    extrusion = matrix[:3, :3] @ np.array(solid.ExtrudedDirection.DirectionRatios, dtype=float)
+    normal = matrix[:3, 2]
+    if not np.allclose(np.abs(normal / np.linalg.norm(normal)), [0, 0, 1], atol=1e-6):
+        return None
+    if not np.allclose(np.cross(extrusion, [0, 0, 1]), 0, atol=1e-6 * np.linalg.norm(extrusion)):
+        return None
+
+    # Keep the outline counter-clockwise and the holes clockwise, so the width rays point into the room
+    rings = []
+    for ring in [points, *voids]:
+        ring = open_ring((ring @ matrix[:2, :2].T + matrix[:2, 3]) * unit_scale)
+        counter_clockwise = signed_area(ring) > 0
+        if counter_clockwise != (not rings):
+            ring = ring[::-1]
+        rings.append(ring)
+
+    return points_to_vectors(rings[0], rings[1:])
+
+def get_room(space, boundaries) -> Room:
+    import ifcopenshell.util.selector
+
+    room_name = space.Name
+    room_longname = ifcopenshell.util.selector.get_element_value(space, "LongName")
+
+    level = "Unknown"
+    return Room(name=room_name, long_name=room_longname, level=level, boundaries=boundaries, global_id=space.GlobalId)
+
+def iter_rooms(model, workers=None, use_profiles=True) -> Iterator[Room]:
+    """
+    Yields the IfcSpaces of the model as rooms as soon as each one is ready.
+    Spaces with a simple extruded profile are read directly when `use_profiles` is set,
+    the rest are tessellated by the geometry iterator on `workers` threads (default: all cores).
+    """
+    import ifcopenshell.geom
+    import ifcopenshell.util.unit
 
-def get_rooms(model) -> List[Room]:
     spaces = model.by_type("IfcSpace")
-
-    rooms = []
-    for space in spaces:
-
-        level = None
+    if not spaces:
+        return
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    start_time = time.perf_counter()
+    done = set()
+
+    # Fast path: footprints straight from the profile definitions
+    if use_profiles:
+        unit_scale = ifcopenshell.util.unit.calculate_unit_scale(model)
+        for space in spaces:
+            try:
+                with tracing.span("load.profile_footprint", room=space.Name):
+                    boundaries = get_profile_boundaries(space, unit_scale)
+            except Exception as e:
+                print(f"Error reading profile of room {space.GlobalId}: {e}")
+                boundaries = None
+            if boundaries is not None:
+                done.add(space.id())
+                yield get_room(space, boundaries)
+    profile_count = len(done)
+
+    # Only the remaining IfcSpaces are tessellated, everything else in the model is skipped
+    remaining = [space for space in spaces if space.id() not in done]
+    if remaining:
+        iterator = ifcopenshell.geom.iterator(get_geom_settings(), model, workers, include=remaining)
+        with tracing.span("load.tessellate"):
+            has_shapes = iterator.initialize()
+        while has_shapes:
+            shape = iterator.get()
+            space = model.by_id(shape.id)
+            try:
+                with tracing.span("load.mesh_footprint", room=space.Name):
+                    room = get_room(space, get_boundaries(shape))
+                done.add(shape.id)
+                yield room
+            except Exception as e:
+                print(f"Error processing room {space.GlobalId}: {e}")
+            with tracing.span("load.tessellate"):
+                has_shapes = iterator.next()
+
+    # Spaces the iterator could not process get a second chance one by one
+    for space in remaining:
+        if space.id() in done:
+            continue
         try:
-            shape = ifcopenshell.geom.create_shape(settings, space)
-            
-            boundaries= get_boundaries(shape)
-            room_name = space.Name
-            room_longname = ifcopenshell.util.selector.get_element_value(space, "LongName")
-           
-            level = "Unknown"
-            rooms.append(Room(name=room_name, long_name=room_longname, level=level, boundaries=boundaries))
-
-            space = model.by_type("IfcSpace")[0]  # Just take one space to inspect
-
-
-
-            # print("=== IFCSpace direct attributes ===")
-            # for attr in dir(space):
-            #     if not attr.startswith("__") and not callable(getattr(space, attr)):
-            #         print(f"{attr}: {getattr(space, attr)}")
-
+            with tracing.span("load.tessellate", room=space.Name):
+                shape = ifcopenshell.geom.create_shape(get_geom_settings(), space)
+            with tracing.span("load.mesh_footprint", room=space.Name):
+                room = get_room(space, get_boundaries(shape))
+            done.add(space.id())
+            yield room
         except Exception as e:
             print(f"Error processing room {space.GlobalId}: {e}")
-    
+
+    elapsed = time.perf_counter() - start_time
+    rate = len(done) / elapsed if elapsed > 0 else float("inf")
+    print(
+        f"Loaded {len(done)} rooms in {elapsed:.2f} s ({rate:.1f} rooms/s, "
+        f"{profile_count} from profiles, {workers} workers)"
+    )
+
+def sort_rooms_by_model_order(model, rooms: List[Room]) -> List[Room]:
+    order = {space.GlobalId: i for i, space in enumerate(model.by_type("IfcSpace"))}
+    return sorted(rooms, key=lambda room: order.get(room.global_id, len(order)))
+
+def get_rooms(model, workers=None, use_profiles=True) -> List[Room]:
+    """Returns the IfcSpaces of the model as rooms, in model order"""
+    with tracing.span("get_rooms"):
+        return sort_rooms_by_model_order(model, list(iter_rooms(model, workers, use_profiles)))
+
+def get_settings_fingerprint(use_profiles=True) -> str:
+    """Everything besides the file content that changes the extracted rooms"""
+    return (
+        f"footprint={FOOTPRINT_VERSION};world_coords={USE_WORLD_COORDS};"
+        f"floor_z={FLOOR_Z_TOLERANCE};weld={WELD_TOLERANCE};profiles={use_profiles}"
+    )
+
+def get_cached_rooms(file_path, cache, use_profiles, extract_rooms):
+    """
+    Rooms of an IFC file and whether they came from the geometry cache. Otherwise the model is
+    opened and extract_rooms(model) returns its rooms and whether they are complete, only
+    complete rooms are stored in the cache.
+    """
+    key = None
+    if cache is not None:
+        key = cache.get_key(file_path, get_settings_fingerprint(use_profiles))
+        rooms = cache.load(key)
+        if rooms is not None:
+            return rooms, True
+
+    import ifcopenshell
+
+    with tracing.span("ifc.open"):
+        model = ifcopenshell.open(file_path)
+    rooms, complete = extract_rooms(model)
+    if key is not None and complete:
+        cache.store(key, rooms)
+    return rooms, False
+
+def load_rooms(file_path, cache=None, workers=None, use_profiles=True) -> List[Room]:
+    """Rooms of an IFC file, from the geometry cache when it holds them"""
+    rooms, _ = get_cached_rooms(
+        file_path, cache, use_profiles, lambda model: (get_rooms(model, workers, use_profiles), True)
+    )
     return rooms
 
 def get_level_from_boundary(space):
@@ -0,0 +1,136 @@
+import multiprocessing
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Iterator, List
+from geometry import Line
+from room import Room
+from vector import RingBoundaries, Vector
+from width_memo import WidthCache, WidthMemo
+from width_solver import ADAPTIVE_TOLERANCE, SAMPLED, min_width_line
+
+# Boundary coordinates of all rooms, attached once in every worker process
+_shared_coords = None
+_shared_memory = None
+
+
+def pack_rings(rooms: List[Room]):
+    """
+    All boundary rings as one (K, 2) array of start points, with per-ring offsets and the
+    range of rings of every room (outer ring first, then the holes)
+    """
+    rings = [ring for room in rooms for ring in (room.ring, *room.holes)]
+    offsets = np.zeros(len(rings) + 1, dtype=np.int64)
+    np.cumsum([len(ring) for ring in rings], out=offsets[1:])
+    room_offsets = np.zeros(len(rooms) + 1, dtype=np.int64)
+    np.cumsum([1 + len(room.holes) for room in rooms], out=room_offsets[1:])
+    coords = np.concatenate(rings) if rings else np.zeros((0, 2))
+    return coords, offsets, room_offsets
+
+
+def rings_to_boundaries(rings) -> List[Vector]:
+    return RingBoundaries(rings[0], rings[1:])
+
+
+def _attach_shared_coords(name, shape):
+    global _shared_coords, _shared_memory
+    # Workers share the resource tracker of the parent, which unlinks the block when the check ends
+    _shared_memory = shared_memory.SharedMemory(name=name)
+    _shared_coords = np.ndarray(shape, dtype=float, buffer=_shared_memory.buf)
+
+
+def _room_width(task):
+    ring_offsets, method, tolerance = task
+    rings = [_shared_coords[start:end] for start, end in zip(ring_offsets[:-1], ring_offsets[1:])]
+    line = min_width_line(rings_to_boundaries(rings), method, tolerance=tolerance)
+    return float(line.length), tuple(map(float, line.start)), tuple(map(float, line.end))
+
+
+def iter_min_width_lines(
+    rooms: List[Room],
+    method=SAMPLED,
+    tolerance=ADAPTIVE_TOLERANCE,
+    workers=1,
+    memo: WidthMemo = None,
+    cache: WidthCache = None,
+) -> Iterator[Line]:
+    """
+    Shortest width line of every room, yielded in room order.
+    With more than one worker the rooms are spread over a process pool that reads
+    the boundaries from shared memory. With a memo, only the first room of every shape
+    is computed, the others get its line moved onto their own outline. With a cache,
+    rooms whose outline is in it from an earlier check are not computed at all.
+    """
+    if cache is None:
+        yield from _iter_shared_lines(rooms, method, tolerance, workers, memo)
+        return
+
+    keys = [cache.get_key(room.ring, method, tolerance, room.holes) for room in rooms]
+    cached_lines = [cache.get(key) for key in keys]
+    computed = _iter_shared_lines(
+        [room for room, line in zip(rooms, cached_lines) if line is None], method, tolerance, workers, memo
+    )
+    try:
+        for key, line in zip(keys, cached_lines):
+            if line is None:
+                line = cache.put(key, next(computed))
+            yield line
+    finally:
+        computed.close()
+
+
+def _iter_shared_lines(rooms: List[Room], method, tolerance, workers, memo) -> Iterator[Line]:
+    if memo is None:
+        yield from _iter_computed_lines(rooms, method, tolerance, workers)
+        return
+
+    shapes = [memo.get_shape(room.ring, room.holes) for room in rooms]
+    # Rooms whose shape is neither in the memo nor computed for an earlier room
+    pending = set()
+    computed_rooms = []
+    for room, shape in zip(rooms, shapes):
+        key = None if shape is None else memo.get_key(shape, method, tolerance)
+        if key is None or (key not in memo.lines and key not in pending):
+            computed_rooms.append(room)
+            pending.add(key)
+
+    computed = _iter_computed_lines(computed_rooms, method, tolerance, workers)
+    try:
+        for shape in shapes:
+            line = memo.get(shape, method, tolerance)
+            if line is None:
+                line = memo.put(shape, method, tolerance, next(computed))
+            yield line
+    finally:
+        computed.close()
+
+
+def _iter_computed_lines(rooms: List[Room], method, tolerance, workers) -> Iterator[Line]:
+    if workers is None or workers <= 1 or len(rooms) <= 1:
+        for room in rooms:
+            yield min_width_line(room.boundaries, method, tolerance=tolerance)
+        return
+
+    coords, offsets, room_offsets = pack_rings(rooms)
+    block = shared_memory.SharedMemory(create=True, size=max(coords.nbytes, 1))
+    executor = None
+    try:
+        np.ndarray(coords.shape, dtype=float, buffer=block.buf)[:] = coords
+        executor = ProcessPoolExecutor(
+            max_workers=min(workers, len(rooms)),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_attach_shared_coords,
+            initargs=(block.name, coords.shape),
+        )
+        tasks = [
+            (offsets[room_offsets[i]:room_offsets[i + 1] + 1].tolist(), method, tolerance)
+            for i in range(len(rooms))
+        ]
+        # map keeps the room order, whatever order the workers finish in
+        for length, start, end in executor.map(_room_width, tasks):
+            yield Line(start=start, end=end, length=length)
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+        block.close()
+        block.unlink()
@@ -1,10 +1,7 @@
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas as rl_canvas
-from reportlab.lib import colors
 from tkinter import filedialog, messagebox
 import os
 import tempfile
-from PIL import ImageGrab
+import tracing
 
 # Color mapping dictionary
 COLOR_MAP = {
@@ -17,6 +14,8 @@ COLOR_MAP = {
 }
 
 def get_image(root, widget):
+    from PIL import ImageGrab
+
     # Get absolute screen coordinates of the widget
     x = widget.winfo_rootx() #+ widget.winfo_x()
     y = widget.winfo_rooty() #+ widget.winfo_y()
@@ -27,6 +26,11 @@ def get_image(root, widget):
 def export_to_pdf(application):
     """Exports the fire regulation results to a PDF file, automatically adding pages if needed."""
 
+    # reportlab is only loaded once a PDF is actually exported
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas as rl_canvas
+    from reportlab.lib import colors
+
     pdf_path = filedialog.asksaveasfilename(defaultextension=".pdf", filetypes=[("PDF files", "*.pdf")])
     if not pdf_path:
         return
@@ -34,60 +38,63 @@ def export_to_pdf(application):
     try:
         tk_canvas = application.app_frame.room_canvas  # Access canvas correctly
 
-        # Create a temporary file for the image
-        with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as temp_img:
-            temp_img_path = temp_img.name
-            canvas_image = get_image(application, tk_canvas)  # Get canvas image
-            canvas_image.save(temp_img_path, format='PNG')
-
-        # Create PDF
-        pdf = rl_canvas.Canvas(pdf_path, pagesize=letter)
-        width, height = letter
-
-        pdf.setFont("Helvetica-Bold", 16)
-        pdf.drawString(50, height - 50, "Fire Regulation and Universal Design Compliance Results")
-        pdf.drawImage(temp_img_path, 50, height - 400, width=canvas_image.width/2.5, height=canvas_image.height/2.5, preserveAspectRatio=True)
+        with tracing.span("pdf.capture"):
+            # Create a temporary file for the image
+            with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as temp_img:
+                temp_img_path = temp_img.name
+                canvas_image = get_image(application, tk_canvas)  # Get canvas image
+                canvas_image.save(temp_img_path, format='PNG')
+
+        with tracing.span("pdf.write"):
+            # Create PDF
+            pdf = rl_canvas.Canvas(pdf_path, pagesize=letter)
+            width, height = letter
+
+            pdf.setFont("Helvetica-Bold", 16)
+            pdf.drawString(50, height - 50, "Fire Regulation and Universal Design Compliance Results")
+            pdf.drawImage(temp_img_path, 50, height - 400, width=canvas_image.width/2.5, height=canvas_image.height/2.5, preserveAspectRatio=True)
+
+            y_position = height - 450
+            black_text = COLOR_MAP.get("black")
+            # The rooms as they were checked, the selection may have changed since
+            rooms = application.result.rooms
+
+            for i, error_msg in enumerate(application.result.get_result_messages()):
+                calculated, text_color, room_color, result = error_msg
+                room = rooms[i]
+                text_color = COLOR_MAP.get(text_color.lower(), "#000000")
+                room_color = COLOR_MAP.get(room_color.lower(), "#FFFFFF")
+
+                if y_position < 100:
+                    pdf.showPage()
+                    pdf.setFont("Helvetica", 10)
+                    y_position = height - 50
 
-        y_position = height - 450
-        black_text = COLOR_MAP.get("black")
-        rooms = [room_item.room for room_item in application.app_frame.room_canvas.rooms.values() if room_item.room.is_part_of_escape_route]
+                pdf.setFont("Helvetica", 12)
+                pdf.setFillColor(colors.HexColor(black_text))
+                pdf.drawString(50, y_position, f"Room: {room.name} - {room.long_name}")
+                y_position -= 30
 
-        for i, error_msg in enumerate(application.result.get_result_messages()):
-            calculated, text_color, room_color, result = error_msg
-            room = rooms[i]
-            text_color = COLOR_MAP.get(text_color.lower(), "#000000")
-            room_color = COLOR_MAP.get(room_color.lower(), "#FFFFFF")
+                # Draw the room color
+                pdf.setFillColor(colors.HexColor(room_color))
+                pdf.rect(50, y_position, 20, 20, fill=1)
 
-            if y_position < 100:
-                pdf.showPage()
                 pdf.setFont("Helvetica", 10)
-                y_position = height - 50
+                pdf.setFillColor(colors.HexColor(black_text))
+                pdf.drawString(100, y_position, calculated)
 
-            pdf.setFont("Helvetica", 12)
-            pdf.setFillColor(colors.HexColor(black_text))
-            pdf.drawString(50, y_position, f"Room: {room.name} - {room.long_name}")
-            y_position -= 30
-
-            # Draw the room color
-            pdf.setFillColor(colors.HexColor(room_color))
-            pdf.rect(50, y_position, 20, 20, fill=1)
-
-            pdf.setFont("Helvetica", 10)
-            pdf.setFillColor(colors.HexColor(black_text))
-            pdf.drawString(100, y_position, calculated)
-
-            pdf.setFillColor(colors.HexColor(text_color))
-            for text in result.split('\n'):
-                if y_position < 100:  # New page needed during text wrap
-                    pdf.showPage()
-                    pdf.setFont("Helvetica", 10)
-                    y_position = height - 50
+                pdf.setFillColor(colors.HexColor(text_color))
+                for text in result.split('\n'):
+                    if y_position < 100:  # New page needed during text wrap
+                        pdf.showPage()
+                        pdf.setFont("Helvetica", 10)
+                        y_position = height - 50
 
-                y_position -= 15
-                pdf.drawString(50, y_position, text)
-            y_position -= 30
+                    y_position -= 15
+                    pdf.drawString(50, y_position, text)
+                y_position -= 30
 
-        pdf.save()
+            pdf.save()
         messagebox.showinfo("Export", "PDF has been generated successfully.")
 
     except Exception as e:
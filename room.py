@@ -1,21 +1,70 @@
-import matplotlib.pyplot as plt
 from typing import List
-from vector import Vector
+import numpy as np
+from vector import RingBoundaries, Vector, boundaries_to_holes, boundaries_to_ring
 
 class Room:
+    __slots__ = (
+        "name", "long_name", "level", "is_part_of_escape_route", "number_of_people", "global_id",
+        "_ring", "_holes", "_boundaries",
+    )
 
     def __init__(
-        self, name: str, long_name: str, level, boundaries=[], is_part_of_escape_route=False, number_of_people = 0
+        self, name: str, long_name: str, level, boundaries=[], is_part_of_escape_route=False, number_of_people = 0,
+        global_id: str = None, ring=None, holes=None
     ):
         self.name : str = name
         self.long_name: str = long_name
         self.level : str = level
-        self.boundaries : List[Vector] = boundaries
+        # The outline is one (N, 2) array of corners, either given directly or taken from the boundaries.
+        # Holes (columns, shafts) are (M, 2) arrays running clockwise.
+        if ring is None:
+            self.set_outline(boundaries_to_ring(boundaries), boundaries_to_holes(boundaries))
+        else:
+            self.set_outline(ring, holes or ())
         self.is_part_of_escape_route = is_part_of_escape_route
         self.number_of_people = number_of_people
+        self.global_id : str = global_id
+
+    def set_outline(self, ring, holes=()):
+        self._ring = np.ascontiguousarray(ring, dtype=float).reshape(-1, 2)
+        self._holes = tuple(np.ascontiguousarray(hole, dtype=float).reshape(-1, 2) for hole in holes)
+        # Keeps the walls and edge frames (directions, normals, lengths) once they are computed
+        self._boundaries = RingBoundaries(self._ring, self._holes)
+
+    @property
+    def ring(self):
+        return self._ring
+
+    @ring.setter
+    def ring(self, ring):
+        self.set_outline(ring, self._holes)
+
+    @property
+    def holes(self):
+        return self._holes
+
+    @holes.setter
+    def holes(self, holes):
+        self.set_outline(self._ring, holes)
+
+    @property
+    def boundaries(self) -> List[Vector]:
+        """Boundaries of the outer ring, then of every hole. Boundary i runs from corner i to corner i + 1 of its ring"""
+        return self._boundaries
+
+    @boundaries.setter
+    def boundaries(self, boundaries: List[Vector]):
+        self.set_outline(boundaries_to_ring(boundaries), boundaries_to_holes(boundaries))
+
+    @property
+    def walls(self):
+        """(N, 2, 2) array of the start and end of every boundary"""
+        return self._boundaries.get_walls()
 
 
     def add_to_plt(self):
+        import matplotlib.pyplot as plt
+
         for i in range(len(self.boundaries)):
             vector = self.boundaries[i]
             
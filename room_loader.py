@@ -0,0 +1,48 @@
+from background import BackgroundTask
+from get_room_geom import get_cached_rooms, iter_rooms, sort_rooms_by_model_order
+
+
+class RoomLoader(BackgroundTask):
+    """
+    Loads the rooms of an IFC file off the UI thread.
+
+    Messages: ("total", number of spaces), ("rooms", list of new rooms), and finally
+    ("done", all rooms in model order), ("cancelled", rooms loaded so far) or ("error", message).
+    """
+    def __init__(self, file_path, cache=None, batch_size=50, workers=None, use_profiles=True):
+        super().__init__()
+        self.file_path = file_path
+        self.cache = cache
+        self.batch_size = batch_size
+        self.workers = workers
+        self.use_profiles = use_profiles
+
+    def work(self) -> None:
+        rooms, from_cache = get_cached_rooms(self.file_path, self.cache, self.use_profiles, self.extract_rooms)
+        if from_cache:
+            self.post("total", len(rooms))
+            self.post("rooms", rooms)
+        elif self.is_cancelled():
+            self.post("cancelled", rooms)
+            return
+        self.post("done", rooms)
+
+    def extract_rooms(self, model):
+        """Posts the rooms in batches while they are extracted, complete unless cancelled"""
+        self.post("total", len(model.by_type("IfcSpace")))
+
+        rooms = []
+        batch = []
+        for room in iter_rooms(model, self.workers, self.use_profiles):
+            if self.is_cancelled():
+                break
+            rooms.append(room)
+            batch.append(room)
+            if len(batch) >= self.batch_size:
+                self.post("rooms", batch)
+                batch = []
+        if batch:
+            self.post("rooms", batch)
+
+        rooms = sort_rooms_by_model_order(model, rooms)
+        return rooms, not self.is_cancelled()
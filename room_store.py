@@ -0,0 +1,98 @@
+import os
+import shutil
+import tempfile
+import numpy as np
+from typing import Iterator, List
+from room import Room
+
+
+class RoomStore:
+    """
+    Columnar storage of the rooms of one model.
+
+    All outlines are one flat (K, 2) coordinate array: ring i is coords[offsets[i]:offsets[i + 1]].
+    Room j owns rings room_offsets[j] to room_offsets[j + 1], its outer ring first and then its holes.
+    Names, GlobalIds, long names and levels are parallel arrays. A store is written as a
+    directory of .npy files, and opened memory-mapped, so the coordinates are only read
+    from disk when they are used and the page cache is shared by every process that
+    opens the same store.
+    """
+    ARRAYS = ("coords", "offsets", "room_offsets", "global_ids", "names", "long_names", "has_long_name", "levels")
+
+    def __init__(self, coords, offsets, room_offsets, global_ids, names, long_names, has_long_name, levels):
+        self.coords = coords
+        self.offsets = offsets
+        self.room_offsets = room_offsets
+        self.global_ids = global_ids
+        self.names = names
+        self.long_names = long_names
+        self.has_long_name = has_long_name
+        self.levels = levels
+
+    @classmethod
+    def from_rooms(cls, rooms: List[Room]) -> "RoomStore":
+        rings = [ring for room in rooms for ring in (room.ring, *room.holes)]
+        offsets = np.zeros(len(rings) + 1, dtype=np.int64)
+        np.cumsum([len(ring) for ring in rings], out=offsets[1:])
+        room_offsets = np.zeros(len(rooms) + 1, dtype=np.int64)
+        np.cumsum([1 + len(room.holes) for room in rooms], out=room_offsets[1:])
+        return cls(
+            coords=np.concatenate(rings) if rings else np.zeros((0, 2)),
+            offsets=offsets,
+            room_offsets=room_offsets,
+            global_ids=np.array([room.global_id or "" for room in rooms], dtype=str),
+            names=np.array([room.name or "" for room in rooms], dtype=str),
+            long_names=np.array([room.long_name or "" for room in rooms], dtype=str),
+            has_long_name=np.array([room.long_name is not None for room in rooms], dtype=bool),
+            levels=np.array([str(room.level) for room in rooms], dtype=str),
+        )
+
+    @classmethod
+    def open(cls, directory: str, mmap: bool = True) -> "RoomStore":
+        """Opens a store written with write(), the arrays are memory-mapped read-only unless mmap is False"""
+        mmap_mode = "r" if mmap else None
+        return cls(**{
+            name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode, allow_pickle=False)
+            for name in cls.ARRAYS
+        })
+
+    def write(self, directory: str) -> None:
+        """Writes every array as a .npy file into a new directory, which appears all at once"""
+        parent = os.path.dirname(os.path.abspath(directory))
+        temporary = tempfile.mkdtemp(dir=parent, suffix=".tmp")
+        try:
+            for name in self.ARRAYS:
+                np.save(os.path.join(temporary, f"{name}.npy"), getattr(self, name), allow_pickle=False)
+            os.replace(temporary, directory)
+        except OSError:
+            shutil.rmtree(temporary, ignore_errors=True)
+            raise
+
+    def __len__(self) -> int:
+        return len(self.room_offsets) - 1
+
+    def iter_rooms(self) -> Iterator[Room]:
+        """Rooms whose rings are views into the store, nothing is copied"""
+        global_ids = self.global_ids.tolist()
+        names = self.names.tolist()
+        long_names = self.long_names.tolist()
+        has_long_name = self.has_long_name.tolist()
+        levels = self.levels.tolist()
+        # Plain ndarray views and int offsets, slicing a memmap is much slower
+        coords = self.coords.view(np.ndarray)
+        offsets = self.offsets.tolist()
+        room_offsets = self.room_offsets.tolist()
+        for i, global_id in enumerate(global_ids):
+            first, last = room_offsets[i], room_offsets[i + 1]
+            yield Room(
+                name=names[i],
+                long_name=long_names[i] if has_long_name[i] else None,
+                level=levels[i],
+                ring=coords[offsets[first]:offsets[first + 1]],
+                holes=[coords[offsets[k]:offsets[k + 1]] for k in range(first + 1, last)],
+                global_id=global_id,
+            )
+
+    def get_rooms(self) -> List[Room]:
+        return list(self.iter_rooms())
+
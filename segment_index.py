@@ -0,0 +1,142 @@
+import numpy as np
+from geometry import normalize_rays, ray_segment_distances, walls_to_array
+
+
+class SegmentGrid:
+    """
+    Uniform grid over the wall segments of one room. Rays walk the grid cell by cell
+    and are only tested against the segments stored in the cells they pass through.
+    """
+    # Upper bound for the number of cells along one axis
+    MAX_CELLS_PER_AXIS = 1024
+
+    def __init__(self, walls, cell_size: float = None):
+        self.walls = walls_to_array(walls)
+        self.seg_start = self.walls[:, 0]
+        self.seg_vec = self.walls[:, 1] - self.walls[:, 0]
+
+        points = self.walls.reshape(-1, 2)
+        low = points.min(axis=0)
+        high = points.max(axis=0)
+        extent = np.maximum(high - low, 1e-9)
+
+        # Aim for roughly one segment per cell
+        if cell_size is None:
+            cell_size = np.sqrt(extent[0] * extent[1] / len(self.walls))
+        cell_size = max(cell_size, float(extent.max()) / self.MAX_CELLS_PER_AXIS, 1e-9)
+
+        self.cell_size: float = cell_size
+        self.origin = low - cell_size / 2
+        self.shape = (np.floor((extent + cell_size) / cell_size).astype(int) + 1)
+        self._build_cells()
+
+    @classmethod
+    def from_room(cls, room, cell_size: float = None):
+        return cls(room.walls, cell_size)
+
+    def _cell_of(self, points):
+        cells = np.floor((points - self.origin) / self.cell_size).astype(int)
+        return np.clip(cells, 0, self.shape - 1)
+
+    def _build_cells(self):
+        nx, ny = self.shape
+
+        # Every segment goes into all cells touched by its (slightly padded) bounding box
+        eps = 1e-9 * max(1.0, float(np.abs(self.walls).max()))
+        low = self._cell_of(np.minimum(self.walls[:, 0], self.walls[:, 1]) - eps)
+        high = self._cell_of(np.maximum(self.walls[:, 0], self.walls[:, 1]) + eps)
+        span = high - low + 1
+        counts = span[:, 0] * span[:, 1]
+
+        segment_ids = np.repeat(np.arange(len(self.walls)), counts)
+        local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        cell_x = low[segment_ids, 0] + local % span[segment_ids, 0]
+        cell_y = low[segment_ids, 1] + local // span[segment_ids, 0]
+        cell_ids = cell_y * nx + cell_x
+
+        # Store the segment lists in CSR form, ordered by cell and then by segment id
+        order = np.lexsort((segment_ids, cell_ids))
+        self.cell_items = segment_ids[order]
+        self.cell_start = np.zeros(nx * ny + 1, dtype=int)
+        np.cumsum(np.bincount(cell_ids, minlength=nx * ny), out=self.cell_start[1:])
+
+    def query_boxes(self, low, high):
+        """
+        Box ids and segment ids of the segments stored in the cells that overlap each axis-aligned
+        box (low, high). A segment can be listed more than once for the same box.
+        """
+        first = self._cell_of(np.asarray(low, dtype=float))
+        last = self._cell_of(np.asarray(high, dtype=float))
+        span = last - first + 1
+        counts = span[:, 0] * span[:, 1]
+        boxes = np.repeat(np.arange(len(first)), counts)
+        local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        cell_x = first[boxes, 0] + local % span[boxes, 0]
+        cell_y = first[boxes, 1] + local // span[boxes, 0]
+        cell_ids = cell_y * self.shape[0] + cell_x
+
+        starts = self.cell_start[cell_ids]
+        item_counts = self.cell_start[cell_ids + 1] - starts
+        box_ids = np.repeat(boxes, item_counts)
+        offsets = np.arange(item_counts.sum()) - np.repeat(np.cumsum(item_counts) - item_counts, item_counts)
+        return box_ids, self.cell_items[np.repeat(starts, item_counts) + offsets]
+
+    def cast_rays(self, origins, direction, return_segments=False):
+        """Nearest wall hit for every ray, same result as geometry.cast_rays"""
+        origins, direction = normalize_rays(origins, direction)
+        hits = np.full(origins.shape, np.nan)
+        distances = np.full(len(origins), np.inf)
+        best_segment = np.full(len(origins), len(self.walls))
+        if len(origins) == 0:
+            return (hits, distances, best_segment) if return_segments else (hits, distances)
+
+        # Grid traversal state of every ray (Amanatides & Woo)
+        cell = self._cell_of(origins)
+        step = np.where(direction >= 0, 1, -1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            next_edge = self.origin + (cell + (step > 0)) * self.cell_size
+            t_max = np.where(direction != 0, (next_edge - origins) / direction, np.inf)
+            t_delta = np.where(direction != 0, self.cell_size / np.abs(direction), np.inf)
+
+        active = np.arange(len(origins))
+        nx, ny = self.shape
+        while len(active):
+            # Test every active ray against the segments of its current cell
+            cell_ids = cell[active, 1] * nx + cell[active, 0]
+            first = self.cell_start[cell_ids]
+            counts = self.cell_start[cell_ids + 1] - first
+            rays = np.repeat(active, counts)
+            if len(rays):
+                offsets = np.arange(len(rays)) - np.repeat(np.cumsum(counts) - counts, counts)
+                segments = self.cell_items[np.repeat(first, counts) + offsets]
+                intersection, distance = ray_segment_distances(
+                    origins[rays], direction[rays], self.seg_start[segments], self.seg_vec[segments]
+                )
+                # Keep the closest hit, ties go to the lowest segment id like the brute-force search
+                better = (distance < distances[rays]) | (
+                    (distance == distances[rays]) & (segments < best_segment[rays])
+                )
+                better &= np.isfinite(distance)
+                order = np.lexsort((segments[better], distance[better], rays[better]))
+                candidates = np.flatnonzero(better)[order]
+                keep = np.ones(len(candidates), dtype=bool)
+                keep[1:] = rays[candidates[1:]] != rays[candidates[:-1]]
+                candidates = candidates[keep]
+                distances[rays[candidates]] = distance[candidates]
+                hits[rays[candidates]] = intersection[candidates]
+                best_segment[rays[candidates]] = segments[candidates]
+
+            # A ray is finished when its hit lies inside the cells visited so far
+            t_exit = t_max[active].min(axis=1)
+            active = active[~(distances[active] < t_exit)]
+
+            # Step the remaining rays into their next cell
+            axis = np.argmin(t_max[active], axis=1)
+            cell[active, axis] += step[active, axis]
+            t_max[active, axis] += t_delta[active, axis]
+            inside = (cell[active] >= 0).all(axis=1) & (cell[active] < self.shape).all(axis=1)
+            active = active[inside]
+
+        if return_segments:
+            return hits, distances, np.where(best_segment < len(self.walls), best_segment, -1)
+        return hits, distances
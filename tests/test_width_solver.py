@@ -0,0 +1,135 @@
+import os
+import sys
+import numpy as np
+import pytest
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from corridors import SHAPES, corridor_room
+from get_room_geom import get_boundaries
+from room import Room
+from segment_index import SegmentGrid
+from width_solver import (
+    ADAPTIVE,
+    ADAPTIVE_TOLERANCE,
+    EXACT,
+    MIN_LINE_LENGTH,
+    SAMPLED,
+    edge_margins,
+    min_width_line,
+    strip_vertices,
+)
+
+
+def subdivide(corners, pieces, jitter, seed=0):
+    """Outline with every wall split into `pieces`, the inner points moved up to `jitter` sideways"""
+    rng = np.random.default_rng(seed)
+    corners = np.asarray(corners, dtype=float)
+    points = []
+    for start, end in zip(corners, np.roll(corners, -1, axis=0)):
+        edge = end - start
+        normal = np.array([-edge[1], edge[0]]) / np.linalg.norm(edge)
+        for k in range(pieces):
+            offset = rng.uniform(-jitter, jitter) if k else 0.0
+            points.append(start + edge * k / pieces + normal * offset)
+    return np.array(points)
+
+
+def make_room(ring):
+    return Room(name="test", long_name=None, level="0", ring=ring)
+
+
+def rectangle(pieces, jitter, seed=0):
+    return make_room(subdivide([[0, 0], [10, 0], [10, 1.5], [0, 1.5]], pieces, jitter, seed))
+
+
+def l_shape(pieces, jitter, seed=0, width=1.8):
+    corners = [[0, 0], [10, 0], [10, 10], [10 - width, 10], [10 - width, width], [0, width]]
+    return make_room(subdivide(corners, pieces, jitter, seed))
+
+
+def widths(room):
+    return {method: float(min_width_line(room.boundaries, method).length) for method in (SAMPLED, EXACT, ADAPTIVE)}
+
+
+@pytest.mark.parametrize("room, expected", [
+    (rectangle(pieces=20, jitter=0.002), 1.496),
+    (l_shape(pieces=20, jitter=0.002), 1.796),
+])
+def test_tessellated_rooms_match_sampled(room, expected):
+    result = widths(room)
+    assert result[SAMPLED] == pytest.approx(expected, abs=0.002)
+    assert result[EXACT] == pytest.approx(result[SAMPLED], abs=0.002)
+    assert result[ADAPTIVE] == pytest.approx(result[SAMPLED], abs=0.002)
+
+
+@pytest.mark.parametrize("seed", range(12))
+def test_jittered_corners_are_not_widths(seed):
+    jitter = 0.001 * (1 + seed % 5)
+    for room, width in ((rectangle(2 + 3 * seed, jitter, seed), 1.5), (l_shape(2 + 2 * seed, jitter, seed), 1.8)):
+        result = widths(room)
+        # Corner grazes used to come out as MIN_LINE_LENGTH or just above it
+        assert result[EXACT] > MIN_LINE_LENGTH + 0.1
+        assert result[EXACT] == pytest.approx(width, abs=2 * jitter + 1e-4)
+        assert result[EXACT] - 1e-6 <= result[ADAPTIVE] <= result[EXACT] + ADAPTIVE_TOLERANCE
+
+
+@pytest.mark.parametrize("shape", SHAPES)
+@pytest.mark.parametrize("segments", [20, 200, 1000])
+def test_benchmark_corridors_match_or_beat_sampled(shape, segments):
+    # Beyond about 2000 segments the first sampled rays of the tiny end walls glance off the
+    # end wall, those sampled minimums are corner grazes
+    result = widths(corridor_room(shape, segments))
+    assert result[EXACT] <= result[SAMPLED] + 1e-6
+    assert result[EXACT] - 1e-6 <= result[ADAPTIVE] <= result[EXACT] + ADAPTIVE_TOLERANCE
+    assert result[EXACT] == pytest.approx(1.8, abs=0.002)
+
+
+@pytest.mark.parametrize("reach", [0.5, 2.0, np.inf])
+def test_grid_finds_the_same_strip_vertices(reach):
+    room = l_shape(pieces=40, jitter=0.01)
+    walls = room.boundaries.get_walls()
+    start, unit, normal, length = room.boundaries.get_frames()
+    edges = np.arange(len(walls))
+    lower = edge_margins(length)
+    upper = length - lower
+    reaches = np.full(len(walls), reach)
+
+    def found(index):
+        strips, along, ahead = strip_vertices(walls, start, unit, normal, edges, lower, upper, reaches, index)
+        return sorted(zip(strips, np.round(along, 9), np.round(ahead, 9)))
+
+    assert found(SegmentGrid(walls)) == found(None)
+    assert len(found(None)) > 0
+
+
+def test_plain_rectangle():
+    result = widths(rectangle(pieces=1, jitter=0.0))
+    for width in result.values():
+        assert width == pytest.approx(1.5)
+
+
+def column_corridor_mesh():
+    """10 m x 2 m corridor with a 0.4 m square column in the middle, as floor and ceiling triangles"""
+    outer = [[0, 0], [10, 0], [10, 2], [0, 2]]
+    column = [[4.8, 0.8], [5.2, 0.8], [5.2, 1.2], [4.8, 1.2]]
+    floor = []
+    for i in range(4):
+        j = (i + 1) % 4
+        # The strip between one side of the corridor and the same side of the column
+        floor.extend([(i, j, 4 + j), (i, 4 + j, 4 + i)])
+    points = np.array(outer + column, dtype=float)
+    verts = np.vstack([np.column_stack([points, np.zeros(8)]), np.column_stack([points, np.full(8, 3.0)])])
+    faces = np.vstack([floor, np.array(floor)[:, ::-1] + 8])
+    return SimpleNamespace(geometry=SimpleNamespace(verts=verts.ravel().tolist(), faces=faces.ravel().tolist()))
+
+
+def test_column_narrows_the_corridor():
+    boundaries = get_boundaries(column_corridor_mesh())
+    assert len(boundaries.holes) == 1
+    room = Room(name="test", long_name=None, level="0", boundaries=boundaries)
+    assert len(room.boundaries) == 8
+    # Without the column every method would find the full 2 m
+    for width in widths(room).values():
+        assert width == pytest.approx(0.8, abs=1e-4)
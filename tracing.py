@@ -0,0 +1,219 @@
+"""
+Named timing spans for the pipeline stages.
+
+    with tracing.span("check.width", room=room.name):
+        ...
+
+Recording is off by default, then span() returns a shared no-op context manager
+and costs one global lookup. Turn it on with enable() or the AFU_TRACE=1 environment
+variable. Spans from all threads are collected in one list, nested spans remember
+their parent stage.
+
+In memory mode (enable(memory=True) or AFU_TRACE=memory) tracemalloc runs as well,
+and every span also records the Python memory it kept (net_bytes) and the highest
+allocation above its start (peak_bytes). tracemalloc counts all threads, so spans that
+run at the same time see each other's allocations.
+"""
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Dict, List
+
+_enabled = os.environ.get("AFU_TRACE", "") not in ("", "0")
+_memory = False
+_lock = threading.Lock()
+_records: List[dict] = []
+_local = threading.local()
+_origin = time.perf_counter()
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def set(self, **attributes):
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+class Span:
+    __slots__ = ("name", "attributes", "start", "parent", "memory_start", "memory_peak")
+
+    def __init__(self, name: str, attributes: dict):
+        self.name = name
+        self.attributes = attributes
+        self.memory_start = None
+
+    def __enter__(self):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        self.parent = stack[-1] if stack else None
+        if _memory and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            # The peak is reset for this span, the enclosing span keeps what it reached so far
+            if self.parent is not None and self.parent.memory_start is not None:
+                self.parent.memory_peak = max(self.parent.memory_peak, peak)
+            tracemalloc.reset_peak()
+            self.memory_start = self.memory_peak = current
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        end = time.perf_counter()
+        _local.stack.pop()
+        record = {
+            "name": self.name,
+            "start": self.start - _origin,
+            "seconds": end - self.start,
+            "parent": self.parent.name if self.parent is not None else None,
+            "thread": threading.current_thread().name,
+        }
+        if self.memory_start is not None and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            peak = max(self.memory_peak, peak)
+            record["net_bytes"] = current - self.memory_start
+            record["peak_bytes"] = peak - self.memory_start
+            if self.parent is not None and self.parent.memory_start is not None:
+                self.parent.memory_peak = max(self.parent.memory_peak, peak)
+        if self.attributes:
+            record.update(self.attributes)
+        if exc_type is not None:
+            record["error"] = exc_type.__name__
+        with _lock:
+            _records.append(record)
+        return False
+
+    def set(self, **attributes):
+        """Adds attributes that are only known once the stage ran"""
+        self.attributes.update(attributes)
+
+
+def span(name: str, **attributes):
+    if not _enabled:
+        return _NO_SPAN
+    return Span(name, attributes)
+
+
+def enable(enabled: bool = True, memory: bool = False) -> None:
+    """Turns recording on or off, with memory accounting when `memory` is set"""
+    global _enabled, _memory
+    _enabled = enabled
+    _memory = enabled and memory
+    if _memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    elif not _memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def is_memory_enabled() -> bool:
+    return _memory
+
+
+def clear() -> None:
+    with _lock:
+        _records.clear()
+
+
+def get_records() -> List[dict]:
+    with _lock:
+        return list(_records)
+
+
+def get_summary(records: List[dict] = None) -> Dict[str, dict]:
+    """Count, total, mean and maximum seconds per span name, in order of first appearance"""
+    summary = {}
+    for record in get_records() if records is None else records:
+        stage = summary.setdefault(record["name"], {"count": 0, "seconds": 0.0, "max_seconds": 0.0})
+        stage["count"] += 1
+        stage["seconds"] += record["seconds"]
+        stage["max_seconds"] = max(stage["max_seconds"], record["seconds"])
+        if "peak_bytes" in record:
+            stage["peak_bytes"] = max(stage.get("peak_bytes", 0), record["peak_bytes"])
+            stage["net_bytes"] = stage.get("net_bytes", 0) + record["net_bytes"]
+    for stage in summary.values():
+        stage["mean_seconds"] = stage["seconds"] / stage["count"]
+    return summary
+
+
+def get_room_timings(records: List[dict] = None) -> Dict[str, Dict[str, float]]:
+    """Seconds per room and span name, for the spans that carry a room attribute"""
+    rooms = {}
+    for record in get_records() if records is None else records:
+        if "room" in record:
+            stages = rooms.setdefault(str(record["room"]), {})
+            stages[record["name"]] = stages.get(record["name"], 0.0) + record["seconds"]
+    return rooms
+
+
+def get_room_memory(records: List[dict] = None) -> Dict[str, Dict[str, int]]:
+    """Highest peak_bytes per room and span name, for the spans recorded in memory mode"""
+    rooms = {}
+    for record in get_records() if records is None else records:
+        if "room" in record and "peak_bytes" in record:
+            stages = rooms.setdefault(str(record["room"]), {})
+            stages[record["name"]] = max(stages.get(record["name"], 0), record["peak_bytes"])
+    return rooms
+
+
+def get_peak_rss():
+    """Peak resident memory of this process in bytes, None when it cannot be read"""
+    try:
+        import resource
+    except ImportError:  # Windows
+        try:
+            import psutil
+        except ImportError:
+            return None
+        return psutil.Process().memory_info().peak_wset
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def get_top_allocations(limit=15) -> List[dict]:
+    """Source lines holding the most traced memory right now"""
+    if not tracemalloc.is_tracing():
+        return []
+    snapshot = tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+    ])
+    return [
+        {"where": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}", "bytes": stat.size, "count": stat.count}
+        for stat in snapshot.statistics("lineno")[:limit]
+    ]
+
+
+def get_report(records: List[dict] = None) -> dict:
+    records = get_records() if records is None else records
+    report = {"stages": get_summary(records), "rooms": get_room_timings(records)}
+    if any("peak_bytes" in record for record in records):
+        report["room_memory"] = get_room_memory(records)
+        report["peak_rss_bytes"] = get_peak_rss()
+        report["top_allocations"] = get_top_allocations()
+    report["spans"] = records
+    return report
+
+
+def dump_json(path) -> None:
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(get_report(), file, indent=2, default=str)
+
+
+if os.environ.get("AFU_TRACE", "") == "memory":
+    enable(memory=True)
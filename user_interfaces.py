@@ -1,8 +1,12 @@
+import os
 import tkinter as tk
-from tkinter import ttk
+from tkinter import ttk, filedialog
 from typing import List, Dict
-from vector import Vector
+import numpy as np
+from geometry import simplify_ring
 from room import Room
+import tracing
+from width_solver import SAMPLED, EXACT, ADAPTIVE, ADAPTIVE_TOLERANCE
 
 
 
@@ -59,6 +63,207 @@ class UsageCategoryFrame(ttk.LabelFrame):
         """Get the currently selected category number"""
         return int(self.selected_category.get())
 
+class WidthMethodFrame(ttk.LabelFrame):
+    def __init__(self, master):
+        super().__init__(master, text="Width Calculation", padding="5")
+        self.selected_method = tk.StringVar(value=SAMPLED)
+
+        methods = [
+            (SAMPLED, "Sampled (every 0.1 m)"),
+            (EXACT, "Exact (wall-pair distances)"),
+            (ADAPTIVE, "Adaptive"),
+        ]
+        for method, text in methods:
+            radio = ttk.Radiobutton(self, text=text, variable=self.selected_method, value=method)
+            radio.pack(side=tk.TOP, anchor=tk.W)
+
+        # Error bound of the adaptive sampling in millimetres
+        tolerance_frame = ttk.Frame(self)
+        tolerance_frame.pack(side=tk.TOP, anchor=tk.W, padx=(20, 0))
+        ttk.Label(tolerance_frame, text="Tolerance ±").pack(side=tk.LEFT)
+        self.tolerance_mm = tk.StringVar(value=str(round(ADAPTIVE_TOLERANCE * 1000)))
+        ttk.Spinbox(
+            tolerance_frame, from_=1, to=100, textvariable=self.tolerance_mm, width=4
+        ).pack(side=tk.LEFT)
+        ttk.Label(tolerance_frame, text="mm").pack(side=tk.LEFT, padx=(2, 0))
+
+        # Spread the rooms over all processor cores
+        self.use_all_cores = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            self, text=f"Use all CPU cores ({os.cpu_count() or 1})", variable=self.use_all_cores
+        ).pack(side=tk.TOP, anchor=tk.W)
+
+    def get_selected_method(self) -> str:
+        """Get the currently selected width calculation method"""
+        return self.selected_method.get()
+
+    def get_tolerance(self) -> float:
+        """Get the adaptive sampling tolerance in metres"""
+        try:
+            tolerance_mm = float(self.tolerance_mm.get())
+        except ValueError:
+            return ADAPTIVE_TOLERANCE
+        return tolerance_mm / 1000 if tolerance_mm > 0 else ADAPTIVE_TOLERANCE
+
+    def get_workers(self) -> int:
+        """Number of worker processes for the width analysis"""
+        return (os.cpu_count() or 1) if self.use_all_cores.get() else 1
+
+class ProgressFrame(ttk.Frame):
+    """Progress bar with a status text and a Cancel button, hidden while idle"""
+    def __init__(self, master):
+        super().__init__(master)
+        self.label = ttk.Label(self, text="")
+        self.label.pack(side=tk.LEFT, padx=(5, 10))
+
+        self.progress_bar = ttk.Progressbar(self, mode="determinate", length=300)
+        self.progress_bar.pack(side=tk.LEFT, fill=tk.X, expand=True)
+
+        self.cancel_button = ttk.Button(self, text="Cancel")
+        self.cancel_button.pack(side=tk.LEFT, padx=5)
+
+        self.text = ""
+        self.total = 0
+
+    def start(self, text: str, cancel_command, total: int = 0) -> None:
+        """Show the frame for a new task"""
+        self.text = text
+        self.cancel_button.configure(command=cancel_command, state=tk.NORMAL)
+        self.set_progress(0, total)
+
+    def set_progress(self, done: int, total: int = None) -> None:
+        if total is not None:
+            self.total = total
+        if self.total:
+            self.progress_bar.configure(mode="determinate", maximum=self.total, value=done)
+            self.label.configure(text=f"{self.text} {done}/{self.total}")
+        else:
+            self.progress_bar.configure(mode="indeterminate")
+            self.progress_bar.step()
+            self.label.configure(text=f"{self.text} {done}")
+
+    def finish(self) -> None:
+        """Hide the frame when the task is over"""
+        self.cancel_button.configure(state=tk.DISABLED)
+        self.pack_forget()
+
+class PerformanceWindow(tk.Toplevel):
+    """Per-stage and per-room timings recorded by the tracing module"""
+    # Span names shown in the room table, summed per column
+    ROOM_COLUMNS = {
+        "Load (ms)": ("load.profile_footprint", "load.tessellate", "load.mesh_footprint"),
+        "Width (ms)": ("check.width",),
+        "Rules (ms)": ("check.rules",),
+    }
+
+    def __init__(self, master, memory_budget_mb: tk.StringVar = None):
+        super().__init__(master)
+        self.title("Performance")
+        self.geometry("800x550")
+
+        controls = ttk.Frame(self, padding="5")
+        controls.pack(side=tk.TOP, fill=tk.X)
+        self.recording = tk.BooleanVar(value=tracing.is_enabled())
+        ttk.Checkbutton(
+            controls, text="Record timings", variable=self.recording, command=self.on_toggle_recording
+        ).pack(side=tk.LEFT)
+        # tracemalloc slows Python code down noticeably, so memory is recorded separately
+        self.recording_memory = tk.BooleanVar(value=tracing.is_memory_enabled())
+        ttk.Checkbutton(
+            controls, text="Record memory", variable=self.recording_memory, command=self.on_toggle_recording
+        ).pack(side=tk.LEFT, padx=(5, 0))
+        ttk.Button(controls, text="Refresh", command=self.refresh).pack(side=tk.LEFT, padx=5)
+        ttk.Button(controls, text="Clear", command=self.clear).pack(side=tk.LEFT)
+        ttk.Button(controls, text="Save JSON...", command=self.save_json).pack(side=tk.RIGHT)
+
+        # Peak memory of the whole process against the budget
+        memory_frame = ttk.Frame(self, padding=(5, 0))
+        memory_frame.pack(side=tk.TOP, fill=tk.X)
+        self.memory_budget_mb = memory_budget_mb or tk.StringVar(value="")
+        ttk.Label(memory_frame, text="Memory budget (MB):").pack(side=tk.LEFT)
+        ttk.Entry(memory_frame, textvariable=self.memory_budget_mb, width=8).pack(side=tk.LEFT, padx=5)
+        self.peak_label = ttk.Label(memory_frame, text="")
+        self.peak_label.pack(side=tk.LEFT, padx=10)
+
+        self.stage_table = self.create_table(
+            "Stages", ("Stage", "Count", "Total (ms)", "Mean (ms)", "Max (ms)", "Peak (MB)", "Kept (MB)")
+        )
+        self.room_table = self.create_table("Rooms", ("Room",) + tuple(self.ROOM_COLUMNS) + ("Peak (KB)",))
+        self.refresh()
+
+    def create_table(self, title, columns) -> ttk.Treeview:
+        frame = ttk.LabelFrame(self, text=title, padding="5")
+        frame.pack(side=tk.TOP, fill=tk.BOTH, expand=True, padx=5, pady=5)
+        table = ttk.Treeview(frame, columns=columns, show="headings", height=8)
+        for column in columns:
+            table.heading(column, text=column)
+            table.column(column, width=100, anchor=tk.E if column != columns[0] else tk.W)
+        scrollbar = ttk.Scrollbar(frame, orient=tk.VERTICAL, command=table.yview)
+        table.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        table.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        return table
+
+    def on_toggle_recording(self) -> None:
+        if self.recording_memory.get():
+            self.recording.set(True)
+        tracing.enable(self.recording.get(), memory=self.recording_memory.get())
+
+    def get_memory_budget(self):
+        """Budget in bytes, None when no valid budget is entered"""
+        try:
+            budget = float(self.memory_budget_mb.get())
+        except ValueError:
+            return None
+        return budget * 1e6 if budget > 0 else None
+
+    def refresh(self) -> None:
+        records = tracing.get_records()
+        self.stage_table.delete(*self.stage_table.get_children())
+        for name, stage in tracing.get_summary(records).items():
+            self.stage_table.insert("", tk.END, values=(
+                name,
+                stage["count"],
+                f"{stage['seconds'] * 1000:.1f}",
+                f"{stage['mean_seconds'] * 1000:.2f}",
+                f"{stage['max_seconds'] * 1000:.2f}",
+                f"{stage['peak_bytes'] / 1e6:.2f}" if "peak_bytes" in stage else "",
+                f"{stage['net_bytes'] / 1e6:.2f}" if "net_bytes" in stage else "",
+            ))
+
+        self.room_table.delete(*self.room_table.get_children())
+        room_memory = tracing.get_room_memory(records)
+        for room, stages in tracing.get_room_timings(records).items():
+            values = [room]
+            for names in self.ROOM_COLUMNS.values():
+                seconds = sum(stages.get(name, 0.0) for name in names)
+                values.append(f"{seconds * 1000:.2f}" if seconds else "")
+            peaks = room_memory.get(room)
+            values.append(f"{max(peaks.values()) / 1e3:.1f}" if peaks else "")
+            self.room_table.insert("", tk.END, values=values)
+
+        peak_rss = tracing.get_peak_rss()
+        budget = self.get_memory_budget()
+        if peak_rss is None:
+            self.peak_label.configure(text="Peak memory: unknown", foreground="black")
+        else:
+            over = budget is not None and peak_rss > budget
+            self.peak_label.configure(
+                text=f"Peak memory: {peak_rss / 1e6:.0f} MB" + (" - over budget!" if over else ""),
+                foreground="red" if over else "black",
+            )
+
+    def clear(self) -> None:
+        tracing.clear()
+        self.refresh()
+
+    def save_json(self) -> None:
+        path = filedialog.asksaveasfilename(
+            parent=self, defaultextension=".json", filetypes=[("JSON files", "*.json")]
+        )
+        if path:
+            tracing.dump_json(path)
+
 class RoomCanvasItem:
     """
     Represents a room drawn on the canvas, including its Room object,
@@ -71,9 +276,33 @@ class RoomCanvasItem:
         self.room_canvas = room_canvas
         self.polygon_id: int = None
         self.current_color: str = self.room_canvas.DEFAULT_COLOR
+
+        # Outline in model coordinates, the view transform of the canvas is applied when drawing
+        self.points = room.ring
+        self.bbox = (*self.points.min(axis=0), *self.points.max(axis=0))
+        # Simplified outlines per level of detail
+        self.outlines = {}
+        self.visible: bool = True
         
         # Draw the room
         self.redraw()
+
+    def get_outline(self, level: int):
+        """Outline simplified with a tolerance of 2**level model units"""
+        outline = self.outlines.get(level)
+        if outline is None:
+            outline = self.outlines[level] = simplify_ring(self.points, 2.0 ** level)
+        return outline
+
+    def get_screen_coords(self) -> list:
+        """Flat x, y list of the outline in the current view of the canvas"""
+        outline = self.get_outline(self.room_canvas.detail_level)
+        return self.room_canvas.to_screen(outline).ravel().tolist()
+
+    def set_visible(self, visible: bool) -> None:
+        if visible != self.visible:
+            self.visible = visible
+            self.canvas.itemconfig(self.polygon_id, state=tk.NORMAL if visible else tk.HIDDEN)
         
     def redraw(self) -> None:
         """Draw or redraw all elements of the room"""
@@ -84,9 +313,8 @@ class RoomCanvasItem:
         self.delete_from_canvas()
         
         # Get points for drawing
-        points = []
-        for vector in self.room.boundaries:
-            points.extend(vector.start)
+        points = self.get_screen_coords()
+        self.visible = True
         
         # Set color based on escape route status
         self.current_color = self.room_canvas.ESCAPE_ROUTE_COLOR if self.room.is_part_of_escape_route else self.room_canvas.DEFAULT_COLOR
@@ -104,10 +332,10 @@ class RoomCanvasItem:
         if old_polygon_id in self.room_canvas.rooms:
             self.room_canvas.rooms[self.polygon_id] = self.room_canvas.rooms.pop(old_polygon_id)
             
-        # Get the main application frame and update room list
-        app_frame = self.master.master
-        if isinstance(app_frame, ApplicationMainFrame):
-            app_frame.room_list_frame.update_room_list(self.room_canvas.rooms)
+        # The polygon id changed, so the room list is rebuilt once the redraws are done
+        app_frame = self.room_canvas._find_app_frame()
+        if app_frame:
+            app_frame.room_list_frame.request_update()
         
     def delete_from_canvas(self) -> None:
         """Delete all canvas elements associated with this room"""
@@ -127,10 +355,10 @@ class RoomCanvasItem:
             self.current_color = self.room_canvas.ESCAPE_ROUTE_COLOR if self.room.is_part_of_escape_route else self.room_canvas.DEFAULT_COLOR
             self.canvas.itemconfig(self.polygon_id, fill=self.current_color)
             
-            # Get the main application frame and update room list
+            # Get the main application frame and update the row of this room
             app_frame = self.room_canvas._find_app_frame()
             if app_frame:
-                app_frame.room_list_frame.update_room_list(self.room_canvas.rooms)
+                app_frame.room_list_frame.update_room_row(self.polygon_id)
                 
             print(f"Room {self.room.name} clicked! Is escape route: {self.room.is_part_of_escape_route}")
 
@@ -186,6 +414,10 @@ class ApplicationMainFrame(ttk.Frame):
         self.reset_view_btn = ttk.Button(self.control_frame, text="Reset View", 
                                         command=self.room_canvas.reset_view)
         self.reset_view_btn.pack(side=tk.RIGHT, padx=2)
+
+        # Summary of the last check
+        self.summary_label = ttk.Label(self.control_frame, text="")
+        self.summary_label.pack(side=tk.LEFT, padx=2)
         
         # Create right side container (for Room List and Legend)
         self.right_container = ttk.Frame(self.main_container)
@@ -202,34 +434,42 @@ class ApplicationMainFrame(ttk.Frame):
     def get_selected_rooms(self) -> List[Room]:
         return self.room_canvas.get_selected_rooms()
 
-    def show_results(self, results: List[tuple[str, str, str]]) -> None:
+    def show_results(self, rooms: List[Room], results: List[tuple[str, str, str, str]]) -> None:
         """Display results in both room list and canvas
         Args:
-            results: List of tuples (message, text_color, room_color)
-                    Each tuple corresponds to an escape route room in order
+            rooms: the checked rooms
+            results: tuple (message, text_color, room_color, long_message) of each checked room
         """
-        # Get escape route rooms in order
-        escape_route_rooms = self.room_canvas.get_escape_route_rooms()
-        
-        if len(results) != len(escape_route_rooms):
-            raise ValueError(f"Number of results ({len(results)}) must match number of escape route rooms ({len(escape_route_rooms)})")
-        
-        # Update room list results
-        messages = []
-        for result in results:
-            message, text_color, _, _= result
-            style = f"{text_color.capitalize()}.TLabel"  # Convert color to style name
-            messages.append((message, style))
-        self.room_list_frame.update_results_with_style(messages)
-        
-        # Update canvas colors
-        for room, result in zip(escape_route_rooms, results):
-            _, _, room_color, _ = result
-            # Find the room item in the canvas
-            for room_id, room_item in self.room_canvas.rooms.items():
-                if room_item.room.name == room.name:
-                    self.room_canvas.itemconfig(room_id, fill=room_color)
-                    break
+        # The selection may have changed during the check, results belong to the rooms that were checked
+        self.room_list_frame.clear_results()
+        for room, result in zip(rooms, results):
+            self.show_room_result(room, result)
+
+    def clear_results(self) -> None:
+        """Remove the results of a previous check from the room list and canvas"""
+        self.room_list_frame.clear_results()
+        self.summary_label.configure(text="")
+        for room_item in self.room_canvas.rooms.values():
+            if room_item.room.is_part_of_escape_route:
+                room_item.set_color(self.room_canvas.ESCAPE_ROUTE_COLOR)
+            else:
+                room_item.set_color(self.room_canvas.DEFAULT_COLOR)
+
+    def show_summary(self, text: str) -> None:
+        self.summary_label.configure(text=text)
+
+    def show_room_result(self, room: Room, result: tuple[str, str, str, str]) -> None:
+        """Display the result of a single room as soon as it is checked
+        Args:
+            room: the checked room
+            result: tuple (message, text_color, room_color, long_message)
+        """
+        message, text_color, room_color, _ = result
+        style = f"{text_color.capitalize()}.TLabel"  # Convert color to style name
+        room_item = self.room_canvas.find_room_item(room)
+        if room_item is not None:
+            room_item.set_color(room_color)
+            self.room_list_frame.set_room_result(room_item.polygon_id, message, style)
 
 class CollapsibleFrame(ttk.Frame):
     def __init__(self, master, text="", **kwargs):
@@ -290,6 +530,14 @@ class RoomColorLegendFrame(CollapsibleFrame):
             text_label.pack(side=tk.LEFT, fill=tk.X, expand=True)
 
 class RoomListFrame(CollapsibleFrame):
+    """
+    Virtualized room list: only a pool of row widgets that fills the visible
+    height exists, and scrolling shows other rooms in the same rows.
+    """
+    ROW_HEIGHT = 26
+    # Rows moved per mouse wheel step
+    WHEEL_ROWS = 3
+
     def __init__(self, master, room_canvas):
         super().__init__(master, text="Toggle Rooms")
         self.room_canvas = room_canvas
@@ -306,36 +554,51 @@ class RoomListFrame(CollapsibleFrame):
         style.configure("Black.TLabel", foreground="black")
         style.configure("Red.TLabel", foreground="red")
         
-        # Create scrollable frame container
+        base_width = 400
+
+        # Type to filter by room name and long name
+        filter_frame = ttk.Frame(self.content)
+        filter_frame.pack(fill=tk.X, padx=5, pady=(0, 5))
+        ttk.Label(filter_frame, text="Filter:").pack(side=tk.LEFT)
+        self.filter_text = tk.StringVar()
+        self.filter_text.trace_add("write", lambda *args: self.apply_filter())
+        ttk.Entry(filter_frame, textvariable=self.filter_text).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(5, 0))
+
+        # Header
+        header_frame = ttk.Frame(self.content)
+        header_frame.pack(fill=tk.X, padx=5, pady=(0, 5))
+        ttk.Label(header_frame, text="Room", font=("TkDefaultFont", 9, "bold")).pack(side=tk.LEFT)
+        ttk.Label(header_frame, text="Result", font=("TkDefaultFont", 9, "bold")).pack(side=tk.LEFT, padx=(150, 0))
+        ttk.Label(header_frame, text="People", font=("TkDefaultFont", 9, "bold")).pack(side=tk.RIGHT, padx=(0, 10))
+        ttk.Separator(self.content, orient="horizontal").pack(fill=tk.X, padx=5)
+
+        # Rows and scrollbar, the rows frame keeps its size so the pool follows the window
         self.scroll_container = ttk.Frame(self.content)
         self.scroll_container.pack(fill=tk.BOTH, expand=True)
-        base_width = 400
-        # Create scrollable frame with increased width
-        self.canvas = tk.Canvas(self.scroll_container, width=base_width)
-        scrollbar = ttk.Scrollbar(self.scroll_container, orient="vertical", command=self.canvas.yview)
-        self.scrollable_frame = ttk.Frame(self.canvas)
-        
-        # Configure scrolling
-        self.scrollable_frame.bind(
-            "<Configure>",
-            lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all"))
-        )
-        
-        self.canvas.create_window((0, 0), window=self.scrollable_frame, anchor="nw", width=base_width)
-        self.canvas.configure(yscrollcommand=scrollbar.set)
-        
-        # Pack scrollbar and canvas
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        
-        # Store room frames for highlighting
-        self.room_frames = {}
-        
-        # Bind mouse wheel events for scrolling
+        self.scrollbar = ttk.Scrollbar(self.scroll_container, orient="vertical", command=self.on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.rows_frame = ttk.Frame(self.scroll_container, width=base_width, height=10 * self.ROW_HEIGHT)
+        self.rows_frame.pack_propagate(False)
+        self.rows_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.rows_frame.bind("<Configure>", self.on_resize)
+
+        # Polygon ids of all rooms sorted by name, and of the rooms that pass the filter
+        self.all_room_ids = []
+        self.room_ids = []
+        self.room_positions = {}
+        self.search_texts = {}
+        # Result message and style per polygon id
+        self.results = {}
+        # Index in room_ids of the room in the first row
+        self.first_row = 0
+        # Pool of row widgets, each shows the room room_ids[first_row + i]
+        self.rows = []
+        # after_idle id of a pending rebuild of the list
+        self.pending_update = None
+
         self.bind_mouse_wheel(self)
-        self.bind_mouse_wheel(self.canvas)
-        self.bind_mouse_wheel(self.scrollable_frame)
-        
+        self.set_row_count(10)
+
     def bind_mouse_wheel(self, widget):
         """Bind mouse wheel events to the widget and all its children"""
         widget.bind("<MouseWheel>", self._on_mousewheel)  # Windows
@@ -349,77 +612,163 @@ class RoomListFrame(CollapsibleFrame):
     def _on_mousewheel(self, event):
         """Handle mouse wheel scrolling"""
         if event.num == 5 or event.delta < 0:  # Scroll down
-            self.canvas.yview_scroll(1, "units")
+            self.scroll_to(self.first_row + self.WHEEL_ROWS)
         elif event.num == 4 or event.delta > 0:  # Scroll up
-            self.canvas.yview_scroll(-1, "units")
-            
+            self.scroll_to(self.first_row - self.WHEEL_ROWS)
+
+    def on_scrollbar(self, action, amount, unit=None):
+        """Scrollbar command, called with ("moveto", fraction) or ("scroll", steps, "units"/"pages")"""
+        if action == "moveto":
+            self.scroll_to(round(float(amount) * len(self.room_ids)))
+        elif action == "scroll":
+            steps = int(amount) * (len(self.rows) if unit == "pages" else 1)
+            self.scroll_to(self.first_row + steps)
+
+    def on_resize(self, event):
+        """Grows or shrinks the row pool to the visible height"""
+        count = max(1, event.height // self.ROW_HEIGHT)
+        if count != len(self.rows):
+            self.set_row_count(count)
+            self.scroll_to(self.first_row)
+
+    def create_row(self):
+        row = ttk.Frame(self.rows_frame, style="Room.TFrame", padding=(5, 2), height=self.ROW_HEIGHT)
+        row.pack_propagate(False)
+        row.pack(fill=tk.X, padx=5, pady=0)
+        row.room_id = None
+        row.name_label = ttk.Label(row, text="", style="Room.TLabel")
+        row.name_label.pack(side=tk.LEFT)
+        row.people_label = ttk.Label(row, text="", style="Room.TLabel", width=6)
+        row.people_label.pack(side=tk.RIGHT, padx=(0, 10))
+        row.result_label = ttk.Label(row, text="", style="Room.TLabel", width=22)
+        row.result_label.pack(side=tk.LEFT, padx=(50, 0))
+
+        # The handlers look up the room the row shows at the time of the event
+        def on_click_people(event):
+            if row.room_id is not None:
+                self.edit_people_count(self.room_canvas.rooms[row.room_id].room, row.room_id)
+
+        def on_enter(event):
+            if row.room_id is not None:
+                self.room_canvas.highlight_room(row.room_id)
+
+        def on_leave(event):
+            if row.room_id is not None:
+                self.room_canvas.unhighlight_room(row.room_id)
+
+        row.people_label.bind("<Button-1>", on_click_people)
+        for widget in (row, row.name_label, row.people_label):
+            widget.bind("<Enter>", on_enter)
+            widget.bind("<Leave>", on_leave)
+        self.bind_mouse_wheel(row)
+        return row
+
+    def set_row_count(self, count):
+        while len(self.rows) < count:
+            self.rows.append(self.create_row())
+        while len(self.rows) > count:
+            self.rows.pop().destroy()
+
+    def scroll_to(self, first_row):
+        """Shows the rooms from index `first_row` of the filtered list in the row pool"""
+        last_start = max(0, len(self.room_ids) - len(self.rows))
+        self.first_row = min(max(0, first_row), last_start)
+        self.render_rows()
+
+    def render_rows(self):
+        for i, row in enumerate(self.rows):
+            index = self.first_row + i
+            row.room_id = self.room_ids[index] if index < len(self.room_ids) else None
+            self.render_row(row)
+
+        total = len(self.room_ids)
+        if total <= len(self.rows):
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self.first_row / total, (self.first_row + len(self.rows)) / total)
+
+    def render_row(self, row):
+        """Fills a pool row with the room it currently shows"""
+        if row.room_id is None:
+            row.configure(style="Room.TFrame")
+            for label in (row.name_label, row.people_label, row.result_label):
+                label.configure(text="", style="Room.TLabel")
+            return
+
+        room = self.room_canvas.rooms[row.room_id].room
+        highlighted = row.room_id == self.highlighted_room_id
+        label_style = "Highlight.TLabel" if highlighted else "Room.TLabel"
+        row.configure(style="Highlight.TFrame" if highlighted else "Room.TFrame")
+        name_text, name_font = self.get_room_name(room)
+        row.name_label.configure(text=name_text, font=name_font, style=label_style)
+        row.people_label.configure(text=str(room.number_of_people), style=label_style)
+        message, style = self.results.get(row.room_id, ("", label_style))
+        row.result_label.configure(text=message, style=style)
+
+    def get_visible_row(self, room_id):
+        """Pool row that currently shows the room, None when it is scrolled out or filtered"""
+        for row in self.rows:
+            if row.room_id == room_id:
+                return row
+        return None
+
+    def request_update(self):
+        """Rebuilds the room list once the event loop is idle, repeated requests are coalesced into one rebuild"""
+        if self.pending_update is None:
+            self.pending_update = self.after_idle(self._run_pending_update)
+
+    def _run_pending_update(self):
+        self.pending_update = None
+        self.update_room_list(self.room_canvas.rooms)
+
+    def flush_update(self):
+        """Runs a pending rebuild right away, so the rows exist before they are changed"""
+        if self.pending_update is not None:
+            self.after_cancel(self.pending_update)
+            self._run_pending_update()
+
+    @staticmethod
+    def get_room_name(room):
+        """Text and font of the name column"""
+        room_name = room.name + " " + room.long_name
+        if room.is_part_of_escape_route:
+            return "→ " + room_name, ("TkDefaultFont", 9, "bold")
+        return room_name, ("TkDefaultFont", 9)
+
+    def update_room_row(self, room_id):
+        """Shows the escape route selection and people count of a single room again"""
+        self.flush_update()
+        row = self.get_visible_row(room_id)
+        if row is not None:
+            self.render_row(row)
+
     def update_room_list(self, rooms):
         """Update the room list display"""
-        # Clear existing items
-        for widget in self.scrollable_frame.winfo_children():
-            widget.destroy()
-        self.room_frames.clear()
-            
-        # Add header
-        header_frame = ttk.Frame(self.scrollable_frame)
-        header_frame.pack(fill=tk.X, padx=5, pady=(0, 5))
-        
-        # Room header (left)
-        ttk.Label(header_frame, text="Room", font=("TkDefaultFont", 9, "bold")).pack(side=tk.LEFT)
-        
-        # Result header (middle)
-        ttk.Label(header_frame, text="Result", font=("TkDefaultFont", 9, "bold")).pack(side=tk.LEFT, padx=(150, 0))
-        
-        # People header (right)
-        ttk.Label(header_frame, text="People", font=("TkDefaultFont", 9, "bold")).pack(side=tk.RIGHT, padx=(0, 10))
-        
-        ttk.Separator(self.scrollable_frame, orient="horizontal").pack(fill=tk.X, padx=5)
-        
-        # Add rooms sorted by name
-        sorted_rooms = sorted(rooms.values(), key=lambda x: x.room.name)
-        
-        for room_item in sorted_rooms:
-            # Create main room frame with default style
-            room_frame = ttk.Frame(self.scrollable_frame, style="Room.TFrame", padding=(5, 2))
-            room_frame.pack(fill=tk.X, padx=5, pady=1)
-            
-            # Store frame reference for highlighting
-            self.room_frames[room_item.polygon_id] = room_frame
-            
-            # Left: Room name with optional long name as tooltip
-            room_name = room_item.room.name + " " + room_item.room.long_name
-            name_text = "→ " + room_name if room_item.room.is_part_of_escape_route else room_name
-            name_font = ("TkDefaultFont", 9, "bold") if room_item.room.is_part_of_escape_route else ("TkDefaultFont", 9)
-            name_label = ttk.Label(room_frame, text=name_text, font=name_font, style="Room.TLabel")
-            name_label.pack(side=tk.LEFT)
-            
-            people_label = ttk.Label(room_frame, text=str(room_item.room.number_of_people), style="Room.TLabel", width=6)
-            people_label.pack(side=tk.RIGHT, padx=(0, 10))
+        if self.pending_update is not None:
+            self.after_cancel(self.pending_update)
+            self.pending_update = None
 
-            result_label = ttk.Label(room_frame, text="", style="Room.TLabel", width=22)
-            result_label.pack(side=tk.LEFT, padx=(50, 0))
-            
-            # Make the people count clickable
-            def on_click_people(event, room=room_item.room):
-                self.edit_people_count(room)
-            people_label.bind("<Button-1>", on_click_people)
-            
-            # Store result label reference
-            room_frame.result_label = result_label
-            
-            # Bind hover events to highlight room
-            def on_enter(e, room_id=room_item.polygon_id):
-                self.room_canvas.highlight_room(room_id)
-                
-            def on_leave(e, room_id=room_item.polygon_id):
-                self.room_canvas.unhighlight_room(room_id)
-            
-            # Bind events to all widgets in the room frame
-            for widget in (room_frame, name_label, people_label):
-                widget.bind("<Enter>", on_enter)
-                widget.bind("<Leave>", on_leave)
+        # Rooms sorted by name, polygon ids change on a redraw so results and highlight are reset
+        self.all_room_ids = sorted(rooms, key=lambda room_id: rooms[room_id].room.name)
+        self.search_texts = {
+            room_id: (rooms[room_id].room.name + " " + rooms[room_id].room.long_name).lower()
+            for room_id in self.all_room_ids
+        }
+        self.results.clear()
+        self.highlighted_room_id = None
+        self.apply_filter()
 
-    def edit_people_count(self, room):
+    def apply_filter(self):
+        """Shows only the rooms whose name or long name contains the filter text"""
+        text = self.filter_text.get().strip().lower()
+        if text:
+            self.room_ids = [room_id for room_id in self.all_room_ids if text in self.search_texts[room_id]]
+        else:
+            self.room_ids = self.all_room_ids
+        self.room_positions = {room_id: i for i, room_id in enumerate(self.room_ids)}
+        self.scroll_to(0)
+
+    def edit_people_count(self, room, room_id):
         """Open a dialog to edit the number of people in a room"""
         # Find the ApplicationMainFrame
         app_frame = self.master
@@ -454,8 +803,8 @@ class RoomListFrame(CollapsibleFrame):
                 new_count = int(entry.get())
                 if new_count >= 0:
                     room.number_of_people = new_count
-                    # Update the room list to show the new count
-                    self.update_room_list(self.room_canvas.rooms)
+                    # Update the row to show the new count
+                    self.update_room_row(room_id)
                     dialog.destroy()
                 else:
                     tk.messagebox.showerror("Invalid Input", "Please enter a non-negative number.")
@@ -469,6 +818,7 @@ class RoomListFrame(CollapsibleFrame):
 
     def highlight_room_frame(self, room_id):
         """Highlight a room frame and scroll it into view"""
+        self.flush_update()
         # Remove old highlight
         if self.highlighted_room_id is not None:
             self.unhighlight_room_frame(self.highlighted_room_id)
@@ -476,80 +826,66 @@ class RoomListFrame(CollapsibleFrame):
         # Set new highlight
         self.highlighted_room_id = room_id
         
-        # Highlight the selected frame
-        if room_id in self.room_frames:
-            frame = self.room_frames[room_id]
-            frame.configure(style="Highlight.TFrame")
-            for child in frame.winfo_children():
-                if isinstance(child, ttk.Label):
-                    child.configure(style="Highlight.TLabel")
-                elif isinstance(child, ttk.Frame):
-                    child.configure(style="Highlight.TFrame")
-                    for grandchild in child.winfo_children():
-                        if isinstance(grandchild, ttk.Label):
-                            grandchild.configure(style="Highlight.TLabel")
+        row = self.get_visible_row(room_id)
+        if row is not None:
+            self.render_row(row)
+        elif room_id in self.room_positions:
+            self.scroll_to(self.room_positions[room_id] - len(self.rows) // 2)
     
     def unhighlight_room_frame(self, room_id):
         """Remove highlight from a room frame"""
-        if room_id in self.room_frames:
-            frame = self.room_frames[room_id]
-            frame.configure(style="Room.TFrame")
-            for child in frame.winfo_children():
-                if isinstance(child, ttk.Label):
-                    child.configure(style="Room.TLabel")
-                elif isinstance(child, ttk.Frame):
-                    child.configure(style="Room.TFrame")
-                    for grandchild in child.winfo_children():
-                        if isinstance(grandchild, ttk.Label):
-                            grandchild.configure(style="Room.TLabel")
-        
         if self.highlighted_room_id == room_id:
             self.highlighted_room_id = None
+        row = self.get_visible_row(room_id)
+        if row is not None:
+            self.render_row(row)
 
-    def update_results_with_style(self, messages):
-        """Update result messages for selected rooms with styles
-        Args:
-            messages (list): List of tuples (message, style)
-        """
-        # Get escape route rooms
-        escape_route_rooms = []
-        for room_id, room_item in self.room_canvas.rooms.items():
-            if room_item.room.is_part_of_escape_route:
-                escape_route_rooms.append(room_id)
-        
-        if len(messages) != len(escape_route_rooms):
-            raise ValueError(f"Number of messages ({len(messages)}) must match number of escape route rooms ({len(escape_route_rooms)})")
-        
-        # Clear all previous results
-        for frame in self.room_frames.values():
-            if hasattr(frame, 'result_label'):
-                frame.result_label.configure(text="", style="Room.TLabel")
-        
-        # Update results for escape route rooms
-        for room_id, (message, style) in zip(escape_route_rooms, messages):
-            if room_id in self.room_frames:
-                frame = self.room_frames[room_id]
-                if hasattr(frame, 'result_label'):
-                    frame.result_label.configure(text=message, style=style)
+    def clear_results(self):
+        """Clear the result column of every room"""
+        self.flush_update()
+        self.results.clear()
+        self.render_rows()
+
+    def set_room_result(self, room_id, message, style):
+        """Show the result message of a single room"""
+        self.flush_update()
+        self.results[room_id] = (message, style)
+        row = self.get_visible_row(room_id)
+        if row is not None:
+            row.result_label.configure(text=message, style=style)
 
 class RoomCanvas(tk.Canvas):
     # Color constants
     DEFAULT_COLOR = "lightgray"
     ESCAPE_ROUTE_COLOR = "lightblue"
     HIGHLIGHT_COLOR = "yellow"
+    # Outlines are simplified until points are this close on screen (pixels)
+    PIXEL_TOLERANCE = 0.5
+    # Zoom and drag events are collected and drawn at most once per frame
+    FRAME_MS = 16
     
     def __init__(self, master, width: int=800, height: int=600):
         super().__init__(master, width=width, height=height, bg="white")
         self.width = width
         self.height = height
         
+        # Canvas items by polygon id, by the id() of their room, and in the order the rooms were added
         self.rooms: Dict[int, RoomCanvasItem] = {}
-        
-        # Initialize view transformation variables
-        self.zoom_scale: float = 1.0
+        self.items_by_room: Dict[int, RoomCanvasItem] = {}
+        self.room_items: List[RoomCanvasItem] = []
+        self.room_bounds = None
+        
+        # Initialize view transformation variables, the fitted view is what reset_view returns to
+        self.fit_scale: float = None
+        self.fit_offset_x: float = 0.0
+        self.fit_offset_y: float = 0.0
         self.base_zoom_scale: float = 1.0
+        # Model to canvas transform, see set_view
+        self.zoom_scale: float = 1.0
         self.offset_x: float = 0.0
         self.offset_y: float = 0.0
+        self.detail_level: int = self.get_detail_level()
+        self.pending_redraw = None
         self.last_x: float = 0.0
         self.last_y: float = 0.0
         self.dragging: bool = False
@@ -607,23 +943,67 @@ class RoomCanvas(tk.Canvas):
 
     def set_rooms(self, rooms: List[Room]) -> None:
         """Sets the rooms to be displayed on the canvas"""
+        with tracing.span("canvas.set_rooms", rooms=len(rooms)):
+            self.clear_rooms()
+            self.fit_view(rooms)
+            self.add_rooms(rooms)
+
+            # Update the room list in the main application frame
+            app_frame = self._find_app_frame()
+            if app_frame:
+                app_frame.room_list_frame.request_update()
+
+    def clear_rooms(self) -> None:
+        """Removes all rooms from the canvas"""
         self.delete("all")
         self.rooms.clear()
-        
-        # Find the bounds of all rooms
-        min_x = float('inf')
-        min_y = float('inf')
-        max_x = float('-inf')
-        max_y = float('-inf')
+        self.items_by_room.clear()
+        self.room_items = []
+        self.room_bounds = None
+        self.fit_scale = None
 
-        self.original_rooms= rooms
-        
-        for room in rooms:
-            for vector in room.boundaries:
-                min_x = min(min_x, vector.start[0], vector.end[0])
-                min_y = min(min_y, vector.start[1], vector.end[1])
-                max_x = max(max_x, vector.start[0], vector.end[0])
-                max_y = max(max_y, vector.start[1], vector.end[1])
+    def append_rooms(self, rooms: List[Room]) -> None:
+        """Adds rooms while a model is still loading, the view is fitted to the first batch"""
+        if not rooms:
+            return
+        if self.fit_scale is None:
+            self.fit_view(rooms)
+        self.add_rooms(rooms)
+
+    def finish_rooms(self, rooms: List[Room]) -> None:
+        """Keeps the rooms drawn while loading, in the final order and fitted to all of them"""
+        with tracing.span("canvas.finish_rooms", rooms=len(rooms)):
+            items_by_room = self.items_by_room
+            self.items_by_room = {}
+            room_items = []
+            for room in rooms:
+                room_item = items_by_room.pop(id(room), None)
+                if room_item is None:
+                    room_item = RoomCanvasItem(room, self, self.master, self)
+                    self.rooms[room_item.polygon_id] = room_item
+                self.items_by_room[id(room)] = room_item
+                room_items.append(room_item)
+            # Rooms that did not make it into the final list
+            for room_item in items_by_room.values():
+                room_item.delete_from_canvas()
+                self.rooms.pop(room_item.polygon_id, None)
+
+            self.room_items = room_items
+            self.room_bounds = None
+            # Moves the existing items with the next frame
+            self.fit_view(rooms)
+            self.schedule_redraw()
+
+            app_frame = self._find_app_frame()
+            if app_frame:
+                app_frame.room_list_frame.request_update()
+
+    def fit_view(self, rooms: List[Room]) -> None:
+        """Computes the view transform that fits the rooms into the canvas"""
+        # Find the bounds of all rooms
+        points = np.vstack([room.ring for room in rooms] or [np.zeros((1, 2))])
+        min_x, min_y = points.min(axis=0)
+        max_x, max_y = points.max(axis=0)
         
         # Calculate the scale to fit in canvas with padding
         width = max_x - min_x
@@ -638,61 +1018,40 @@ class RoomCanvas(tk.Canvas):
         scale_y = canvas_height / height if height > 0 else 1.0
         initial_scale = min(scale_x, scale_y)
         
-        # Calculate center offset to position rooms in middle of canvas
+        # Calculate center offset to position rooms in middle of canvas, the y axis points down on screen
         center_x = (min_x + max_x) / 2
         center_y = (min_y + max_y) / 2
         
-        offset_x = self.width / 2 - center_x * initial_scale
-        offset_y = self.height / 2 - center_y * initial_scale
-        
-        # Transform and add rooms
-        for room in rooms:
-            transformed_vectors = []
-            for vector in room.boundaries:
-                # Flip Y coordinates by subtracting from canvas height
-                start = (
-                    vector.start[0] * initial_scale + offset_x,
-                    self.height - (vector.start[1] * initial_scale + offset_y)  # Flip Y coordinate
-                )
-                end = (
-                    vector.end[0] * initial_scale + offset_x,
-                    self.height - (vector.end[1] * initial_scale + offset_y)    # Flip Y coordinate
-                )
-                transformed_vectors.append(Vector(start, end))
-            
-            transformed_room = Room(
-                room.name,
-                room.long_name,
-                room.level,
-                transformed_vectors,
-                room.is_part_of_escape_route,
-                room.number_of_people
-            )
-            self.add_room(transformed_room)
-            
+        self.fit_scale = initial_scale
+        self.fit_offset_x = self.width / 2 - center_x * initial_scale
+        self.fit_offset_y = self.height / 2 + center_y * initial_scale
+
         # Store the scale for future use
-        self.zoom_scale = initial_scale
         self.base_zoom_scale = initial_scale
-        
-        # Update the room list in the main application frame
-        app_frame = self._find_app_frame()
-        if app_frame:
-            app_frame.room_list_frame.update_room_list(self.rooms)
+        self.set_view(initial_scale, self.fit_offset_x, self.fit_offset_y)
 
-    def update_room_people(self):
-        i=0
-        for room in self.rooms.values():
-            self.original_rooms[i].number_of_people = room.room.number_of_people
-            i+=1
+    def add_rooms(self, rooms: List[Room]) -> None:
+        """Draws the rooms with the current view transform"""
+        for room in rooms:
+            self.add_room(room)
+        # Rooms outside the viewport are hidden with the next frame
+        self.schedule_redraw()
 
     def add_room(self, room: Room) -> None:
         """Adds a Room object to the canvas"""
         room_item = RoomCanvasItem(room, self, self.master, self)  # Pass self as room_canvas
         self.rooms[room_item.polygon_id] = room_item
+        self.items_by_room[id(room)] = room_item
+        self.room_items.append(room_item)
+        self.room_bounds = None
 
     def get_escape_route_rooms(self) -> List[Room]:
-        """Returns a list of Room objects that are part of the escape route."""
-        return [room.room for room in self.rooms.values() if room.room.is_part_of_escape_route]
+        """Returns a list of Room objects that are part of the escape route, in the order they were added."""
+        return [room_item.room for room_item in self.room_items if room_item.room.is_part_of_escape_route]
+
+    def find_room_item(self, room: Room):
+        """Canvas item that draws the room, None if it is not on the canvas"""
+        return self.items_by_room.get(id(room))
 
     def start_drag(self, event: tk.Event) -> None:
         """Start canvas dragging"""
@@ -709,12 +1068,10 @@ class RoomCanvas(tk.Canvas):
         dx = event.x - self.last_x
         dy = event.y - self.last_y
         
-        # Update the offset
+        # Update the offset, the rooms are moved with the next frame
         self.offset_x += dx
         self.offset_y += dy
-        
-        # Move all canvas objects
-        self.move("all", dx, dy)
+        self.schedule_redraw()
         
         # Update last position
         self.last_x = event.x
@@ -740,35 +1097,79 @@ class RoomCanvas(tk.Canvas):
         
     def zoom(self, x: float, y: float, factor: float) -> None:
         """Zoom the canvas around a point"""
-        # Update scale
-        self.zoom_scale *= factor
-        
-        # Scale all objects relative to the zoom point
-        self.scale("all", x, y, factor, factor)
-        
-        # Update text sizes - use list to avoid dictionary modification during iteration
-        room_items = list(self.rooms.values())
-        for room_item in room_items:    
-            # Update room's stored center position
-            if room_item.polygon_id:
-                coords = self.coords(room_item.polygon_id)
-                if coords and len(coords) >= 4:  # Make sure we have at least 2 points (4 coordinates)
-                    room_item.center_x = sum(coords[::2]) / (len(coords[::2]))
-                    room_item.center_y = sum(coords[1::2]) / (len(coords[1::2]))
+        self.set_view(self.zoom_scale * factor, x - (x - self.offset_x) * factor, y - (y - self.offset_y) * factor)
+        self.schedule_redraw()
+
+    def set_view(self, zoom_scale: float, offset_x: float, offset_y: float) -> None:
+        """Sets the view transform: screen x = model x * zoom_scale + offset_x, screen y = offset_y - model y * zoom_scale"""
+        self.zoom_scale = zoom_scale
+        self.offset_x = offset_x
+        self.offset_y = offset_y
+        self.detail_level = self.get_detail_level()
+
+    def to_screen(self, points):
+        """Projects (N, 2) model points to the canvas"""
+        return points * (self.zoom_scale, -self.zoom_scale) + (self.offset_x, self.offset_y)
+
+    def get_detail_level(self) -> int:
+        """Level of detail for the current zoom, outlines are simplified to 2**level model units"""
+        return int(np.floor(np.log2(self.PIXEL_TOLERANCE / self.zoom_scale)))
+
+    def get_viewport(self):
+        """Visible part of the canvas in model coordinates (min_x, min_y, max_x, max_y)"""
+        width = self.winfo_width() if self.winfo_width() > 1 else self.width
+        height = self.winfo_height() if self.winfo_height() > 1 else self.height
+        return (
+            -self.offset_x / self.zoom_scale,
+            (self.offset_y - height) / self.zoom_scale,
+            (width - self.offset_x) / self.zoom_scale,
+            self.offset_y / self.zoom_scale,
+        )
+
+    def get_room_bounds(self):
+        """(N, 4) bounding boxes of the rooms in the order of room_items"""
+        if self.room_bounds is None:
+            self.room_bounds = np.array([room_item.bbox for room_item in self.room_items]).reshape(-1, 4)
+        return self.room_bounds
+
+    def schedule_redraw(self) -> None:
+        """Redraws the view with the next frame, bursts of zoom and drag events share one redraw"""
+        if self.pending_redraw is None:
+            self.pending_redraw = self.after(self.FRAME_MS, self.redraw_view)
+
+    def redraw_view(self) -> None:
+        """Draws the rooms in the viewport at the current level of detail and hides the others"""
+        self.pending_redraw = None
+        with tracing.span("canvas.redraw", rooms=len(self.room_items)):
+            min_x, min_y, max_x, max_y = self.get_viewport()
+            bounds = self.get_room_bounds()
+            visible = ~(
+                (bounds[:, 2] < min_x) | (bounds[:, 0] > max_x) | (bounds[:, 3] < min_y) | (bounds[:, 1] > max_y)
+            )
+            shown = []
+            for room_item, is_visible in zip(self.room_items, visible.tolist()):
+                room_item.set_visible(is_visible)
+                if is_visible:
+                    shown.append(room_item)
+            if not shown:
+                return
+
+            # All visible outlines are projected in one operation
+            outlines = [room_item.get_outline(self.detail_level) for room_item in shown]
+            screen = self.to_screen(np.concatenate(outlines))
+            ends = np.cumsum([len(outline) for outline in outlines]).tolist()
+            for room_item, start, end in zip(shown, [0] + ends[:-1], ends):
+                self.coords(room_item.polygon_id, screen[start:end].ravel().tolist())
         
     def reset_view(self) -> None:
         """Reset view to original position and scale"""
-        # Reset transformation variables
-        self.zoom_scale = 1.0
-        self.offset_x = 0.0
-        self.offset_y = 0.0
-        
-        # Delete all current objects
-        self.delete("all")
-        
-        # Redraw all rooms
-        for room_item in list(self.rooms.values()):
-            self.add_room(room_item.room)
+        if self.fit_scale is None:
+            return
+        self.set_view(self.fit_scale, self.fit_offset_x, self.fit_offset_y)
+        if self.pending_redraw is not None:
+            self.after_cancel(self.pending_redraw)
+        self.redraw_view()
+
 
 class ToolTip:
     def __init__(self, widget, text):
@@ -1,11 +1,27 @@
 import numpy as np
+from collections.abc import Sequence
 
 class Vector:
+    __slots__ = ("start", "end", "_direction", "_length")
+
     def __init__(self, start, end):
         self.start: tuple = start
         self.end: tuple = end
-        self.direction = np.array(end) - np.array(start)
-        self.length: float= np.linalg.norm(self.direction)
+        # Direction and length are only computed when they are used
+        self._direction = None
+        self._length = None
+
+    @property
+    def direction(self):
+        if self._direction is None:
+            self._direction = np.subtract(self.end, self.start, dtype=float)
+        return self._direction
+
+    @property
+    def length(self) -> float:
+        if self._length is None:
+            self._length = float(np.hypot(*self.direction))
+        return self._length
 
     def get_x_vals(self):
         return [self.start[0], self.end[0]]
@@ -16,10 +32,91 @@ class Vector:
     
 
     def get_number_of_points_along_line(self, spacing=0.1):
-        start = np.array(self.start)
-        end = np.array(self.end)
-
         # Determine number of points
         num_points = max(2, int(self.length / spacing) + 1)  # +1 to include end point
         
-        return num_points
\ No newline at end of file
+        return num_points
+
+
+def get_edge_frames(walls):
+    """Start point, unit direction, left normal and length of every wall of an (N, 2, 2) array"""
+    start = walls[:, 0]
+    direction = walls[:, 1] - start
+    length = np.linalg.norm(direction, axis=1)
+    unit = direction / np.where(length > 0, length, 1.0)[:, None]
+    normal = np.stack([-unit[:, 1], unit[:, 0]], axis=1)
+    return start, unit, normal, length
+
+
+class RingBoundaries(Sequence):
+    """
+    The boundaries of a closed (N, 2) ring, and of the holes inside it, as a read-only list of Vectors.
+    The outer ring runs counter-clockwise and the holes clockwise, so the room is always on the left.
+    Boundary i runs from corner i to corner i + 1 of the same ring, the outer ring comes first and
+    then every hole. The Vectors are made when they are accessed, the walls array and the edge
+    frames are computed on first use and kept.
+    """
+    __slots__ = ("ring", "holes", "_walls", "_frames")
+
+    def __init__(self, ring, holes=()):
+        self.ring = ring
+        self.holes = tuple(holes)
+        self._walls = None
+        self._frames = None
+
+    def get_rings(self):
+        return (self.ring, *self.holes)
+
+    def __len__(self):
+        return sum(len(ring) for ring in self.get_rings())
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if index < 0:
+            raise IndexError("boundary index out of range")
+        for ring in self.get_rings():
+            count = len(ring)
+            if index < count:
+                return Vector(tuple(ring[index].tolist()), tuple(ring[(index + 1) % count].tolist()))
+            index -= count
+        raise IndexError("boundary index out of range")
+
+    def __iter__(self):
+        for ring in self.get_rings():
+            points = [tuple(point) for point in ring.tolist()]
+            for start, end in zip(points, points[1:] + points[:1]):
+                yield Vector(start, end)
+
+    def get_walls(self):
+        """(N, 2, 2) array of the start and end of every boundary"""
+        if self._walls is None:
+            self._walls = np.concatenate(
+                [np.stack([ring, np.roll(ring, -1, axis=0)], axis=1) for ring in self.get_rings()]
+            )
+            self._walls.setflags(write=False)
+        return self._walls
+
+    def get_frames(self):
+        """Start point, unit direction, left normal and length of every boundary, see get_edge_frames"""
+        if self._frames is None:
+            self._frames = get_edge_frames(self.get_walls())
+            for array in self._frames:
+                array.setflags(write=False)
+        return self._frames
+
+
+def boundaries_to_ring(boundaries):
+    """(N, 2) corners of a closed list of boundaries, without copying a ring that is already an array"""
+    if isinstance(boundaries, RingBoundaries):
+        return boundaries.ring
+    return np.array([boundary.start for boundary in boundaries], dtype=float).reshape(-1, 2)
+
+
+def boundaries_to_holes(boundaries):
+    """Hole rings of the boundaries, plain lists of Vectors have none"""
+    if isinstance(boundaries, RingBoundaries):
+        return boundaries.holes
+    return ()
@@ -0,0 +1,193 @@
+"""
+Width lines shared between rooms of the same shape.
+
+Rooms that are copies of each other (the same corridor on every storey, or rotated to
+another wing) have the same minimum width line up to where they are placed. A room's
+shape key is its outline in a canonical frame: the origin on a canonical corner, the
+x axis along the edge leaving that corner, coordinates rounded to SHAPE_TOLERANCE. The
+canonical corner is found from the edge lengths and turn angles alone, so the key does
+not change when the room is moved, rotated, or its outline starts at another corner.
+Holes (columns, shafts) are part of the key in the same frame. Mirrored copies get a
+different key.
+
+WidthCache keeps the line of every room between checks, keyed by its exact outline,
+so checking again after changing only the people counts, usage category or public
+building setting reuses every line and only runs the rules.
+
+    memo = WidthMemo()
+    shape = memo.get_shape(room.ring, room.holes)
+    line = memo.get(shape, method, tolerance)
+    if line is None:
+        line = memo.put(shape, method, tolerance, min_width_line(room.boundaries, method, tolerance=tolerance))
+"""
+import hashlib
+import numpy as np
+from collections import OrderedDict
+from typing import Optional
+from geometry import Line
+from width_solver import ADAPTIVE
+
+# Rounding of the canonical corner coordinates (metres)
+SHAPE_TOLERANCE = 1e-4
+# Rounding of the turn angles used to find the canonical corner (radians)
+ANGLE_TOLERANCE = 1e-4
+# Rooms whose width line is kept between checks
+MAX_CACHED_ROOMS = 20000
+
+
+def least_rotation(sequence) -> int:
+    """Start index of the lexicographically smallest rotation of the sequence (Booth's algorithm)"""
+    doubled = sequence + sequence
+    failure = [-1] * len(doubled)
+    k = 0
+    for j in range(1, len(doubled)):
+        item = doubled[j]
+        i = failure[j - k - 1]
+        while i != -1 and item != doubled[k + i + 1]:
+            if item < doubled[k + i + 1]:
+                k = j - i - 1
+            i = failure[i]
+        if item != doubled[k + i + 1]:  # i is -1 here
+            if item < doubled[k]:
+                k = j
+            failure[j - k] = -1
+        else:
+            failure[j - k] = i + 1
+    return k
+
+
+class CanonicalShape:
+    """Shape key of one outline, and the frame that maps canonical points back onto it"""
+    __slots__ = ("key", "origin", "axis")
+
+    def __init__(self, key: bytes, origin, axis):
+        self.key = key
+        self.origin = origin
+        self.axis = axis
+
+    def to_canonical(self, points):
+        offset = np.asarray(points, dtype=float) - self.origin
+        ux, uy = self.axis
+        return np.column_stack([offset @ (ux, uy), offset @ (-uy, ux)])
+
+    def from_canonical(self, points):
+        points = np.asarray(points, dtype=float)
+        ux, uy = self.axis
+        return self.origin + points[:, :1] * (ux, uy) + points[:, 1:] * (-uy, ux)
+
+
+def join_rings(rings) -> bytes:
+    # Every ring is prefixed with its length, so different splits never give the same bytes
+    return b"".join(np.int64(len(ring)).tobytes() + ring.tobytes() for ring in rings)
+
+
+def get_canonical_shape(ring, tolerance=SHAPE_TOLERANCE, holes=()) -> Optional[CanonicalShape]:
+    """Canonical shape of an (N, 2) outline and its holes, None for outlines that are too small to compare"""
+    ring = np.asarray(ring, dtype=float)
+    if len(ring) < 3:
+        return None
+    edges = np.roll(ring, -1, axis=0) - ring
+    lengths = np.hypot(edges[:, 0], edges[:, 1])
+    if not lengths.all():
+        return None
+    previous = np.roll(edges, 1, axis=0)
+    turns = np.arctan2(
+        previous[:, 0] * edges[:, 1] - previous[:, 1] * edges[:, 0],
+        np.einsum("ij,ij->i", previous, edges),
+    )
+
+    # Corner i as (length of the edge leaving it, turn onto that edge)
+    descriptors = list(zip(
+        np.round(lengths / tolerance).astype(np.int64).tolist(),
+        np.round(turns / ANGLE_TOLERANCE).astype(np.int64).tolist(),
+    ))
+    start = least_rotation(descriptors)
+
+    shape = CanonicalShape(b"", ring[start], edges[start] / lengths[start])
+    canonical = shape.to_canonical(np.roll(ring, -start, axis=0))
+    rings = [np.round(canonical / tolerance).astype(np.int64)]
+
+    # Holes start at their smallest corner and are sorted, so their order in the room does not matter
+    canonical_holes = []
+    for hole in holes:
+        hole = np.round(shape.to_canonical(hole) / tolerance).astype(np.int64)
+        first = min(range(len(hole)), key=lambda i: tuple(hole[i]))
+        canonical_holes.append(np.roll(hole, -first, axis=0))
+    rings.extend(sorted(canonical_holes, key=lambda hole: hole.tobytes()))
+
+    shape.key = join_rings(rings)
+    return shape
+
+
+class WidthMemo:
+    """
+    Minimum width lines by shape key and width settings, stored in canonical coordinates.
+    hits and misses count the lookups since the memo was made.
+    """
+
+    def __init__(self, tolerance=SHAPE_TOLERANCE):
+        self.tolerance = tolerance
+        self.lines = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_key(self, shape: CanonicalShape, method, tolerance):
+        # The adaptive tolerance changes the result of that method only
+        return method, tolerance if method == ADAPTIVE else None, shape.key
+
+    def get_shape(self, ring, holes=()) -> Optional[CanonicalShape]:
+        return get_canonical_shape(ring, self.tolerance, holes)
+
+    def get(self, shape: Optional[CanonicalShape], method, tolerance) -> Optional[Line]:
+        """Width line of an earlier room with the same shape, moved onto this one"""
+        canonical = None if shape is None else self.lines.get(self.get_key(shape, method, tolerance))
+        if canonical is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        length, points = canonical
+        start, end = shape.from_canonical(points).tolist()
+        return Line(start=tuple(start), end=tuple(end), length=length)
+
+    def put(self, shape: Optional[CanonicalShape], method, tolerance, line: Line) -> Line:
+        if shape is not None:
+            points = shape.to_canonical([line.start, line.end])
+            self.lines[self.get_key(shape, method, tolerance)] = (line.length, points)
+        return line
+
+
+class WidthCache:
+    """
+    Minimum width lines of single rooms by outline and width settings. Beyond max_rooms
+    the least recently used line is dropped. hits and misses count all lookups.
+    """
+
+    def __init__(self, max_rooms=MAX_CACHED_ROOMS):
+        self.max_rooms = max_rooms
+        self.lines = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_key(self, ring, method, tolerance, holes=()):
+        rings = [np.ascontiguousarray(part, dtype=float) for part in (ring, *holes)]
+        digest = hashlib.blake2b(join_rings(rings), digest_size=16).digest()
+        return method, tolerance if method == ADAPTIVE else None, digest
+
+    def get(self, key) -> Optional[Line]:
+        line = self.lines.get(key)
+        if line is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.lines.move_to_end(key)
+        return line
+
+    def put(self, key, line: Line) -> Line:
+        self.lines[key] = line
+        self.lines.move_to_end(key)
+        while len(self.lines) > self.max_rooms:
+            self.lines.popitem(last=False)
+        return line
+
+    def clear(self) -> None:
+        self.lines.clear()
@@ -0,0 +1,482 @@
+import numpy as np
+from typing import List
+from geometry import (
+    Line,
+    cast_rays,
+    find_shortest_line,
+    perpendicular_lines_from_vector,
+    walls_to_array,
+)
+from segment_index import SegmentGrid
+from vector import RingBoundaries, Vector, get_edge_frames
+
+# Width calculation methods
+SAMPLED = "sampled"
+EXACT = "exact"
+ADAPTIVE = "adaptive"
+WIDTH_METHODS = (SAMPLED, EXACT, ADAPTIVE)
+
+# Rooms with at least this many boundary segments get a spatial index for the ray queries
+SEGMENT_INDEX_THRESHOLD = 64
+
+# Lines shorter than this are ignored, they come from rays hitting a neighbouring wall at a corner
+MIN_LINE_LENGTH = 0.3 #TODO: 0.3 parameter comes from user.
+
+# Distance used to evaluate the one-sided limits at the ends of each interval
+EXACT_EPSILON = 1e-7
+
+# A ray that glances off the wall it hits (see CORNER_GRAZE_ANGLE), and whose origin and hit
+# are joined by a stretch of outline less than this much longer than the ray, runs past a
+# corner instead of across the room. It is not a width (metres)
+CORNER_DETOUR = 0.3
+
+# Largest angle between a corner graze and the wall it hits (degrees). Rays that meet a wall
+# more head-on than this cross the room, even right next to an end wall.
+CORNER_GRAZE_ANGLE = 45.0
+
+# Adaptive sampling: first pass spacing, default error bound and smallest interval it splits
+ADAPTIVE_COARSE_SPACING = 1.0
+ADAPTIVE_TOLERANCE = 0.005
+ADAPTIVE_MIN_INTERVAL = 1e-6
+
+
+def boundaries_to_walls(boundaries: List[Vector]):
+    # Boundaries of a Room are already one array
+    if isinstance(boundaries, RingBoundaries):
+        return boundaries.get_walls()
+    return walls_to_array([(boundary.start, boundary.end) for boundary in boundaries])
+
+
+def get_segment_index(walls):
+    return SegmentGrid(walls) if len(walls) >= SEGMENT_INDEX_THRESHOLD else None
+
+
+def cast(origins, directions, walls, index=None):
+    # Hit points, distances and hit wall ids
+    if index is not None:
+        return index.cast_rays(origins, directions, return_segments=True)
+    return cast_rays(origins, directions, walls, return_segments=True)
+
+
+def edge_frames(boundaries, walls):
+    # Start point, unit direction, left normal and length of every wall, kept by the boundaries of a Room
+    if isinstance(boundaries, RingBoundaries):
+        return boundaries.get_frames()
+    return get_edge_frames(walls)
+
+
+def edge_margins(length):
+    # Same margins as geometry.cut_up_line
+    return np.minimum(0.15, 0.05 * length)
+
+
+def boundary_positions(walls, length):
+    """
+    Distance along its ring to the start of every wall, the ring of every wall and the perimeter
+    of every ring. A new ring starts wherever a wall does not start at the end of the one before.
+    None unless every ring closes.
+    """
+    ring_start = np.ones(len(walls), dtype=bool)
+    ring_start[1:] = (walls[1:, 0] != walls[:-1, 1]).any(axis=1)
+    first = np.flatnonzero(ring_start)
+    last = np.append(first[1:], len(walls)) - 1
+    if not np.array_equal(walls[last, 1], walls[first, 0]):
+        return None
+    ring_ids = np.cumsum(ring_start) - 1
+    before = np.cumsum(length) - length
+    position = before - before[first][ring_ids]
+    perimeter = before[last] + length[last] - before[first]
+    return position, ring_ids, perimeter
+
+
+def corner_detours(walls, unit, positions, ray_edges, ray_positions, segments, hits, distances):
+    """
+    How much longer the shorter way along the outline from each ray's origin to its hit is
+    than the ray itself, for rays that glance off the wall they hit. Infinite for all other
+    rays: rays without a hit, rays that meet the wall more head-on than CORNER_GRAZE_ANGLE,
+    rays that hit another ring (a hole across from the wall) and walls that do not form
+    closed rings.
+    """
+    detours = np.full(len(distances), np.inf)
+    if positions is None:
+        return detours
+    wall_position, ring_ids, perimeter = positions
+    found = np.flatnonzero(segments >= 0)
+    found = found[ring_ids[segments[found]] == ring_ids[ray_edges[found]]]
+    # The rays run along the left normal of their wall, so the cosine between a ray and the
+    # wall it hits is the cross product of the two wall directions
+    ray_unit, hit_unit = unit[ray_edges[found]], unit[segments[found]]
+    glancing = np.abs(ray_unit[:, 0] * hit_unit[:, 1] - ray_unit[:, 1] * hit_unit[:, 0])
+    found = found[glancing > np.cos(np.radians(CORNER_GRAZE_ANGLE))]
+    segment = segments[found]
+    hit_position = wall_position[segment] + np.linalg.norm(hits[found] - walls[segment, 0], axis=1)
+    gap = np.abs(hit_position - wall_position[ray_edges[found]] - ray_positions[found])
+    detours[found] = np.minimum(gap, perimeter[ring_ids[segment]] - gap) - distances[found]
+    return detours
+
+
+def detour_crossings(origin_a, origin_b, hit_a, hit_b, length_a, length_b, detour_a, detour_b, same_wall, min_length):
+    """
+    Width lines where the detour reaches CORNER_DETOUR between the two rays of each interval.
+    Both rays must hit the same wall, then the width and the detour are linear in between.
+    Lengths are infinite where there is no such line longer than min_length.
+    """
+    crossing = (
+        same_wall
+        & np.isfinite(length_a)
+        & np.isfinite(length_b)
+        & ((detour_a >= CORNER_DETOUR) != (detour_b >= CORNER_DETOUR))
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = np.where(crossing, (CORNER_DETOUR - detour_a) / (detour_b - detour_a), 0.0)
+    lengths = length_a + t * (length_b - length_a)
+    lengths = np.where(crossing & (lengths > min_length), lengths, np.inf)
+    origins = origin_a + t[:, None] * (origin_b - origin_a)
+    hits = hit_a + t[:, None] * (hit_b - hit_a)
+    return origins, hits, lengths
+
+
+def strip_vertices(walls, start, unit, normal, edges, lower, upper, reach, index=None):
+    """
+    Vertices in front of a wall, at most `reach` ahead of it, whose projection falls between
+    `lower` and `upper` along it, for every strip given by those four arrays. Returns the strip
+    ids with the distance of each vertex along and ahead of its wall. With a segment index only
+    the ends of the segments stored in the grid cells around each strip are tested.
+    """
+    vertices, ends = np.unique(walls.reshape(-1, 2), axis=0, return_inverse=True)
+    if index is None:
+        strips = np.repeat(np.arange(len(edges)), len(vertices))
+        vertex_ids = np.tile(np.arange(len(vertices)), len(edges))
+    else:
+        # Bounding box of every strip, an unlimited reach ends at the far side of the room
+        ends = ends.reshape(-1, 2)
+        extent = float(np.linalg.norm(np.ptp(vertices, axis=0)))
+        depth = np.minimum(reach, extent)[:, None] * normal[edges]
+        near = start[edges] + lower[:, None] * unit[edges]
+        far = start[edges] + upper[:, None] * unit[edges]
+        corners = np.stack([near, far, near + depth, far + depth])
+        box_ids, segment_ids = index.query_boxes(corners.min(axis=0), corners.max(axis=0))
+        # Segments sit in several cells and share their ends, sorting the pairs drops the repeats
+        pairs = np.sort(np.concatenate([
+            box_ids * len(vertices) + ends[segment_ids, 0],
+            box_ids * len(vertices) + ends[segment_ids, 1],
+        ]))
+        pairs = pairs[np.append(True, pairs[1:] != pairs[:-1])]
+        strips, vertex_ids = np.divmod(pairs, len(vertices))
+
+    relative = vertices[vertex_ids] - start[edges[strips]]
+    along = np.einsum("ik,ik->i", relative, unit[edges[strips]])
+    ahead = np.einsum("ik,ik->i", relative, normal[edges[strips]])
+    inside = (ahead > 0) & (ahead <= reach[strips]) & (along > lower[strips]) & (along < upper[strips])
+    return strips[inside], along[inside], ahead[inside]
+
+
+def sampled_min_width_line(boundaries: List[Vector], min_length=MIN_LINE_LENGTH) -> Line:
+    """Shortest perpendicular line from points sampled every 0.1 m along the boundaries"""
+    walls = boundaries_to_walls(boundaries)
+    index = get_segment_index(walls)
+
+    # Define number of points and offset to cut the boundary lines
+    offset = 0.1
+    all_perpendicular_lines_list = []
+
+    for boundary in boundaries:
+        num_points = boundary.get_number_of_points_along_line()
+        perpendicular_lines_list = perpendicular_lines_from_vector(
+            boundary, num_points, walls, offset, index
+        )
+        all_perpendicular_lines_list.extend(perpendicular_lines_list)
+
+    return find_shortest_line(
+        [line for line in all_perpendicular_lines_list if line.length > min_length]
+    )
+
+
+def exact_min_width_line(boundaries: List[Vector], min_length=MIN_LINE_LENGTH) -> Line:
+    """
+    Exact minimum of the perpendicular width over the whole length of every boundary.
+
+    While a point slides along a wall, its perpendicular ray keeps hitting the same
+    opposite wall until the ray passes one of the polygon vertices, so the ray length
+    is linear between the projections of the vertices in front of the wall. The minimum
+    therefore lies at the ends of those intervals, and only the rays there are cast.
+    Rays that only glance past a corner (see CORNER_DETOUR) are not widths and are left out;
+    the detour is linear inside an interval as well, so where it reaches the limit is
+    another candidate. The sampled rays start inside the same ranges, so the result is
+    never above the sampled one, unless the sampled minimum is such a corner graze. The
+    interval ends are EXACT_EPSILON inside the intervals, so the result can be a few
+    hundredths of a millimetre above the true minimum.
+
+    One ray from the middle of every wall bounds the minimum from above first. Where the
+    width is not linear it is at least as long as the ray to the vertex it passes, so the
+    vertices farther ahead than that bound are left out of the intervals.
+    """
+    walls = boundaries_to_walls(boundaries)
+    index = get_segment_index(walls)
+    start, unit, normal, length = edge_frames(boundaries, walls)
+    margin = edge_margins(length)
+    lower = margin
+    upper = length - margin
+    positions = boundary_positions(walls, length)
+
+    def cast_at(edges, ray_positions):
+        origins = start[edges] + ray_positions[:, None] * unit[edges]
+        hits, distances, segments = cast(origins, normal[edges], walls, index)
+        detours = corner_detours(walls, unit, positions, edges, ray_positions, segments, hits, distances)
+        kept = (distances > min_length) & (detours >= CORNER_DETOUR)
+        return origins, hits, distances, segments, detours, kept
+
+    def interval_lines(edges, range_start, range_end, reach):
+        """
+        Candidate lines inside the given ranges along the walls, and the intervals that pass
+        a vertex beyond reach and may hide a corner detour crossing behind it
+        """
+        strips, vertex_along, _ = strip_vertices(
+            walls, start, unit, normal, edges, range_start, range_end, reach, index
+        )
+
+        # Interval ends along every range: its limits plus the vertices projecting onto it
+        ranges = np.arange(len(edges))
+        strip_ids = np.concatenate([strips, ranges, ranges])
+        ends = np.concatenate([vertex_along, range_start, range_end])
+        order = np.lexsort((ends, strip_ids))
+        strip_ids = strip_ids[order]
+        ends = ends[order]
+
+        # Consecutive ends in the same range form the intervals
+        same_strip = strip_ids[1:] == strip_ids[:-1]
+        interval_edge = edges[strip_ids[:-1][same_strip]]
+        interval_start = ends[:-1][same_strip]
+        interval_end = ends[1:][same_strip]
+        keep = interval_end - interval_start > 2 * EXACT_EPSILON
+        interval_edge = interval_edge[keep]
+        interval_start = interval_start[keep]
+        interval_end = interval_end[keep]
+
+        # Cast the rays at both ends of every interval in one batch
+        count = len(interval_edge)
+        origins, hits, distances, segments, detours, kept = cast_at(
+            np.concatenate([interval_edge, interval_edge]),
+            np.concatenate([interval_start + EXACT_EPSILON, interval_end - EXACT_EPSILON]),
+        )
+        origin_a, origin_b = origins[:count], origins[count:]
+        hit_a, hit_b = hits[:count], hits[count:]
+        length_a, length_b = distances[:count], distances[count:]
+        detour_a, detour_b = detours[:count], detours[count:]
+        same_wall = segments[:count] == segments[count:]
+        both = np.isfinite(length_a) & np.isfinite(length_b)
+        crossing_origins, crossing_hits, crossing_lengths = detour_crossings(
+            origin_a, origin_b, hit_a, hit_b, length_a, length_b,
+            detour_a, detour_b, same_wall, min_length,
+        )
+
+        # The width is linear inside an interval, so its smallest kept value is at one of the
+        # ends or where the detour crosses the limit. Ends at exactly min_length are not kept,
+        # like the sampled lines, an interval that drops below it ends at a corner.
+        lines = (
+            np.concatenate([origin_a, origin_b, crossing_origins]),
+            np.concatenate([hit_a, hit_b, crossing_hits]),
+            np.concatenate([
+                np.where(both & kept[:count], length_a, np.inf),
+                np.where(both & kept[count:], length_b, np.inf),
+                crossing_lengths,
+            ]),
+        )
+        # Next to each end the rays keep hitting the same wall, so the width there is never
+        # below where the line through that wall meets the ray at the other end
+        floor = np.full(count, np.inf)
+        ray = normal[interval_edge]
+        for hit_segments, detour, distance, other in (
+            (segments[:count], detour_a, length_a, origin_b),
+            (segments[count:], detour_b, length_b, origin_a),
+        ):
+            wall = walls[hit_segments]
+            direction = wall[:, 1] - wall[:, 0]
+            relative = wall[:, 0] - other
+            with np.errstate(divide="ignore", invalid="ignore"):
+                line_distance = (
+                    (relative[:, 0] * direction[:, 1] - relative[:, 1] * direction[:, 0])
+                    / (ray[:, 0] * direction[:, 1] - ray[:, 1] * direction[:, 0])
+                )
+            floor = np.where(np.isfinite(detour), np.fmin(np.minimum(floor, distance), line_distance), floor)
+        hidden = both & ~same_wall & (floor < np.inf)
+        return lines, (interval_edge[hidden], interval_start[hidden], interval_end[hidden], floor[hidden])
+
+    valid = np.flatnonzero(length > 0)
+    _, _, distances, _, _, kept = cast_at(valid, (lower[valid] + upper[valid]) / 2)
+    reach = np.full(len(valid), np.min(distances[kept], initial=np.inf) + EXACT_EPSILON)
+    (origins, hits, lengths), hidden = interval_lines(valid, lower[valid], upper[valid], reach)
+
+    # Where a corner graze ends in such an interval and the width next to it could still drop
+    # below the minimum, solve the interval again with all of its vertices
+    hidden_edge, hidden_start, hidden_end, floor = hidden
+    again = floor < np.min(lengths, initial=np.inf)
+    if again.any():
+        (more_origins, more_hits, more_lengths), _ = interval_lines(
+            hidden_edge[again], hidden_start[again], hidden_end[again], np.full(again.sum(), np.inf)
+        )
+        origins = np.concatenate([origins, more_origins])
+        hits = np.concatenate([hits, more_hits])
+        lengths = np.concatenate([lengths, more_lengths])
+
+    i = np.argmin(lengths) if len(lengths) else None
+    if i is None or not np.isfinite(lengths[i]):
+        raise ValueError(f"No width line longer than {min_length} m was found")
+
+    return Line(start=tuple(origins[i]), end=tuple(hits[i]), length=lengths[i])
+
+
+def adaptive_min_width_line(
+    boundaries: List[Vector],
+    min_length=MIN_LINE_LENGTH,
+    tolerance=ADAPTIVE_TOLERANCE,
+    coarse_spacing=ADAPTIVE_COARSE_SPACING,
+) -> Line:
+    """
+    Coarse-to-fine sampling whose result is at most `tolerance` above the exact minimum.
+
+    Every wall is sampled every `coarse_spacing` metres first. Between two neighbouring
+    rays the width can only drop below the smaller of the two where a polygon vertex
+    lies inside the quadrilateral spanned by the rays, and never below that vertex.
+    Intervals are split until no such lower bound is more than `tolerance` below the
+    current minimum. Corner rays are left out like in exact_min_width_line.
+    """
+    walls = boundaries_to_walls(boundaries)
+    index = get_segment_index(walls)
+    start, unit, normal, length = edge_frames(boundaries, walls)
+
+    margin = edge_margins(length)
+    lower = margin
+    upper = length - margin
+
+    positions = boundary_positions(walls, length)
+
+    # Every ray cast so far, intervals refer to their two rays by index
+    rays = {"origins": np.zeros((0, 2)), "hits": np.zeros((0, 2)), "lengths": np.zeros(0),
+            "segments": np.zeros(0, dtype=int), "detours": np.zeros(0)}
+
+    best = np.inf
+    best_line = None
+
+    def update_best(origins, hits, values):
+        nonlocal best, best_line
+        if len(values) and values.min() < best:
+            i = np.argmin(values)
+            best = values[i]
+            best_line = (origins[i], hits[i])
+
+    def cast_at(edges, ray_positions):
+        """Casts the rays and returns their indices"""
+        origins = start[edges] + ray_positions[:, None] * unit[edges]
+        hits, distances, segments = cast(origins, normal[edges], walls, index)
+        detours = corner_detours(walls, unit, positions, edges, ray_positions, segments, hits, distances)
+        kept = (distances > min_length) & (detours >= CORNER_DETOUR)
+        update_best(origins, hits, np.where(kept, distances, np.inf))
+        first = len(rays["lengths"])
+        for name, values in zip(rays, (origins, hits, distances, segments, detours)):
+            rays[name] = np.concatenate([rays[name], values])
+        return np.arange(first, first + len(edges))
+
+    # Coarse pass
+    valid = np.flatnonzero(length > 0)
+    counts = np.maximum(2, ((upper[valid] - lower[valid]) / coarse_spacing).astype(int) + 2)
+    point_edges = np.repeat(valid, counts)
+    local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    fraction = local / np.repeat(counts - 1, counts)
+    point_positions = lower[point_edges] + fraction * (upper[point_edges] - lower[point_edges])
+    point_rays = cast_at(point_edges, point_positions)
+
+    # Vertices in front of every wall, ordered by wall and position for range lookups. Vertices
+    # farther ahead than the coarse minimum can never lower a bound below it and are left out.
+    vertex_edges, vertex_along, vertex_ahead = strip_vertices(
+        walls, start, unit, normal, valid, lower[valid], upper[valid], np.full(len(valid), best), index
+    )
+    vertex_edges = valid[vertex_edges]
+    key_scale = float(length.max()) + 1.0
+    vertex_keys = vertex_edges * key_scale + vertex_along
+    order = np.argsort(vertex_keys)
+    vertex_keys = vertex_keys[order]
+    vertex_along = vertex_along[order]
+    vertex_ahead = vertex_ahead[order]
+
+    # Neighbouring coarse points on the same wall form the first intervals
+    pair = np.flatnonzero(point_edges[1:] == point_edges[:-1])
+    edge = point_edges[pair]
+    s_a, s_b = point_positions[pair], point_positions[pair + 1]
+    ray_a, ray_b = point_rays[pair], point_rays[pair + 1]
+
+    while len(edge):
+        length_a, length_b = rays["lengths"][ray_a], rays["lengths"][ray_b]
+
+        # Vertices inside the quadrilateral between the two rays of each interval
+        first = np.searchsorted(vertex_keys, edge * key_scale + s_a, side="right")
+        last = np.searchsorted(vertex_keys, edge * key_scale + s_b, side="left")
+        counts = np.maximum(last - first, 0)
+        owner = np.repeat(np.arange(len(edge)), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        vertex = np.repeat(first, counts) + offsets
+
+        with np.errstate(invalid="ignore"):
+            ratio = (vertex_along[vertex] - s_a[owner]) / (s_b[owner] - s_a[owner])
+            chord = length_a[owner] + ratio * (length_b[owner] - length_a[owner])
+        inside = ~(vertex_ahead[vertex] >= chord - 1e-9)
+        bound = np.minimum(length_a, length_b)
+        np.minimum.at(bound, owner[inside], vertex_ahead[vertex][inside])
+        proven = np.ones(len(edge), dtype=bool)
+        proven[owner[inside]] = False
+        proven &= np.isfinite(length_a) & np.isfinite(length_b)
+        # Rays hitting different walls pass a vertex that was left out
+        proven &= rays["segments"][ray_a] == rays["segments"][ray_b]
+
+        # A proven interval is linear: its smallest kept width is at an end (already
+        # counted) or where the corner detour crosses the limit
+        linear = np.flatnonzero(proven)
+        crossing_origins, crossing_hits, crossing_lengths = detour_crossings(
+            rays["origins"][ray_a[linear]], rays["origins"][ray_b[linear]],
+            rays["hits"][ray_a[linear]], rays["hits"][ray_b[linear]],
+            length_a[linear], length_b[linear],
+            rays["detours"][ray_a[linear]], rays["detours"][ray_b[linear]],
+            rays["segments"][ray_a[linear]] == rays["segments"][ray_b[linear]],
+            min_length,
+        )
+        update_best(crossing_origins, crossing_hits, crossing_lengths)
+
+        # Split only the intervals that could still hide a width below best - tolerance
+        refine = (
+            ~proven
+            & (np.maximum(bound, min_length) < best - tolerance)
+            & (s_b - s_a > ADAPTIVE_MIN_INTERVAL)
+        )
+        if not refine.any():
+            break
+
+        edge, s_a, s_b = edge[refine], s_a[refine], s_b[refine]
+        ray_a, ray_b = ray_a[refine], ray_b[refine]
+
+        s_mid = (s_a + s_b) / 2
+        ray_mid = cast_at(edge, s_mid)
+
+        edge = np.concatenate([edge, edge])
+        s_a, s_b = np.concatenate([s_a, s_mid]), np.concatenate([s_mid, s_b])
+        ray_a, ray_b = np.concatenate([ray_a, ray_mid]), np.concatenate([ray_mid, ray_b])
+
+    if best_line is None:
+        raise ValueError(f"No width line longer than {min_length} m was found")
+
+    origin, hit = best_line
+    return Line(start=tuple(origin), end=tuple(hit), length=best)
+
+
+def min_width_line(
+    boundaries: List[Vector],
+    method=SAMPLED,
+    min_length=MIN_LINE_LENGTH,
+    tolerance=ADAPTIVE_TOLERANCE,
+) -> Line:
+    if method == SAMPLED:
+        return sampled_min_width_line(boundaries, min_length)
+    if method == EXACT:
+        return exact_min_width_line(boundaries, min_length)
+    if method == ADAPTIVE:
+        return adaptive_min_width_line(boundaries, min_length, tolerance)
+    raise ValueError(f"Unknown width method: {method}")